@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'crawler'))
+
+import core
+import fci_site
+from crawl_fci import FciCrawler
+
+
+class Interrupt(Exception):
+    pass
+
+
+class InterruptingDumper(core.Dumper):
+    def __init__(self, target, limit):
+        super().__init__(target.dumpDir)
+        self.target = target
+        self.limit = limit
+
+    def dump(self, item, crawler):
+        if self.limit <= 0:
+            raise Interrupt()
+        self.limit -= 1
+        self.target.dump(item, crawler)
+
+    def __getattr__(self, name):
+        return getattr(self.target, name)
+
+
+def crawl(url, basedir, options, interrupt=None):
+    craw = FciCrawler(url=url, basedir=basedir, **options)
+    if interrupt is not None:
+        craw.engine.dumper = InterruptingDumper(craw.engine.dumper, interrupt)
+    try:
+        craw.crawl()
+    except Interrupt:
+        return False
+    return True
+
+
+def main(args):
+    site = fci_site.FciSite(breeds=args.breeds, groups=args.groups)
+    server = fci_site.serve(site=site, latency=args.latency, jitter=args.jitter,
+        errorRate=args.error_rate, throttleRate=args.throttle_rate, seed=args.seed)
+    url = f'{server.url}en/nomenclature/'
+
+    options = dict(workers=args.jobs, rate=args.rate, delay=0, processes=args.processes,
+        state=core.JournalState if args.journal else None, store=args.store)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        basedir = args.data_dir or tmp
+        start = time.perf_counter()
+        if args.interrupt:
+            crawl(url, basedir, options, interrupt=args.interrupt)
+            before = server.stats.requests
+            print(f'interrupted after {args.interrupt} items, {before} requests', file=sys.stderr)
+        crawl(url, basedir, options)
+        elapsed = time.perf_counter() - start
+
+        stats = server.stats
+        print(f'breeds:   {site.breeds}')
+        print(f'requests: {stats.requests}')
+        print(f'statuses: {dict(sorted(stats.statuses.items()))}')
+        print(f'bytes:    {stats.bytes}')
+        print(f'time:     {elapsed:.2f} s')
+        print(f'rate:     {stats.requests / elapsed:.1f} requests/s')
+        print(f'max RSS:  {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB')
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Crawl a local FCI site simulator and report throughput and memory')
+    parser.add_argument('-n', '--breeds', type=int, default=360, help='Number of breeds')
+    parser.add_argument('-g', '--groups', type=int, default=10, help='Number of groups')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of concurrent requests')
+    parser.add_argument('--rate', type=float, help='Requests per second, per host')
+    parser.add_argument('-p', '--processes', type=int, help='Parse pages in a pool of processes')
+    parser.add_argument('--journal', action='store_true', help='Keep crawler state in an append-only journal')
+    parser.add_argument('--store', action='store_true', help='Dump entries into a single SQLite store')
+    parser.add_argument('--latency', type=float, default=0, help='Server delay before each response, seconds')
+    parser.add_argument('--jitter', type=float, default=0, help='Random extra server delay, seconds')
+    parser.add_argument('--error-rate', type=float, default=0, help='Share of requests answered with 500 or 503')
+    parser.add_argument('--throttle-rate', type=float, default=0, help='Share of requests answered with 429')
+    parser.add_argument('--seed', type=int, help='Random seed for latency and errors')
+    parser.add_argument('--interrupt', type=int, metavar='N', help='Stop after N items, then resume from saved state')
+    parser.add_argument('-o', '--data-dir', help='Data directory, default is a temporary directory')
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'crawler'))
+
+import export_fci
+
+
+def measure(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, res
+
+
+def main(args):
+    rows = export_fci.load(args.file, format='csv')
+    fields = list(rows[0])
+
+    print('%-8s %10s %10s %8s' % ('format', 'size, KB', 'load, ms', 'vs csv'))
+    with tempfile.TemporaryDirectory() as tmp:
+        base = None
+        for format in ['csv', 'jsonl', 'sqlite', 'parquet', 'arrow']:
+            fn = Path(tmp) / f'breeds.{format}'
+            try:
+                export_fci.export(rows, fields, fn, format=format)
+            except Exception as e:
+                print('%-8s %s' % (format, e))
+                continue
+            elapsed, res = measure(lambda: export_fci.load(fn, format=format), args.repeat)
+            if res != rows:
+                raise Exception(f'{format}: loaded rows differ')
+            base = base or elapsed
+            print('%-8s %10.1f %10.2f %7.2fx' % (format, fn.stat().st_size / 1024, elapsed * 1000, base / elapsed))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Load time of export_fci output formats')
+    parser.add_argument('file', nargs='?', default=Path(__file__).resolve().parent.parent.parent / 'fci-breeds.csv',
+        help='the CSV file to convert, default is fci-breeds.csv')
+    parser.add_argument('-n', '--repeat', type=int, default=20, help='Repeat count, best time is reported')
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+import csv
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'crawler'))
+
+from bench_suite import measure
+from breed_index import BreedIndex
+
+
+def scan_csv(fn, id, group):
+    with open(fn, 'r', newline='') as fp:
+        rows = list(csv.DictReader(fp))
+    byId = [row for row in rows if row['id'] == str(id)]
+    byGroup = [row for row in rows if row['group'] == group]
+    return byId, byGroup
+
+
+def main(files, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        for fn in files:
+            snap = Path(tmp) / (Path(fn).stem + '.fcix')
+            with BreedIndex.from_file(fn) as index:
+                index.save(snap)
+                first = next(iter(index))
+                id, group = first.id, first.group
+
+            tCsv, _ = measure(lambda: scan_csv(fn, id, group), repeat)
+            tBuild, _ = measure(lambda: BreedIndex.from_file(fn), repeat)
+
+            def cold():
+                with BreedIndex.load(snap) as index:
+                    return index[id], index.find(group=group)
+            tCold, _ = measure(cold, repeat)
+
+            with BreedIndex.load(snap) as index:
+                tOpen, _ = measure(lambda: BreedIndex(index.buffer), repeat)
+                tId, _ = measure(lambda: index[id], repeat)
+                tGroup, _ = measure(lambda: index.find(group=group), repeat)
+                tBoth, _ = measure(lambda: index.find(group=group, country=first.country), repeat)
+
+            print(f'{Path(fn).name:20} {snap.stat().st_size:7} bytes'
+                f'  csv scan {tCsv * 1e6:8.1f}us  build {tBuild * 1e6:8.1f}us  load+query {tCold * 1e6:7.1f}us'
+                f'  open {tOpen * 1e6:6.1f}us  id {tId * 1e6:5.2f}us  group {tGroup * 1e6:6.2f}us'
+                f'  group+country {tBoth * 1e6:6.2f}us')
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compare CSV scans with breed index snapshot lookups')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Repetitions per case')
+    parser.add_argument('files', nargs='*', help='CSV files, default is all fci-breeds*.csv')
+    args = parser.parse_args()
+    main(args.files or sorted(map(str, Path('.').glob('fci-breeds*.csv'))), args.repeat)
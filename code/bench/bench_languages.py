@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'crawler'))
+
+import fci_site
+from crawl_fci import FciCrawler, FciDumper
+
+
+def crawl(server, basedir, rate, language='en', languages=None):
+    start = server.stats.requests
+    craw = FciCrawler(url=f'{server.url}{language}/nomenclature/', basedir=basedir, language=language,
+        languages=languages, rate=rate, progress=True)
+    craw.crawl()
+    return server.stats.requests - start
+
+
+def entries(todir):
+    dumper = FciDumper(todir)
+    return {fn.parent.name: dumper.load(dict(refid=fn.parent.name)) for fn in todir.glob('dump/*/entry.json')}
+
+
+def main(args):
+    server = fci_site.serve(site=fci_site.FciSite(breeds=args.breeds, groups=args.groups))
+    languages = ['en'] + args.languages
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        multi = crawl(server, Path(tmp) / 'multi', args.rate, languages=languages)
+        single = 0
+        for lang in languages:
+            single += crawl(server, Path(tmp) / lang, args.rate, language=lang)
+            expected = entries(Path(tmp) / lang / 'fci')
+            found = entries(Path(tmp) / 'multi' / ('fci' if lang == 'en' else f'fci-{lang}'))
+            diff = [refid for refid in sorted(expected, key=int) if found.get(refid) != expected[refid]]
+            print(f'{lang}  entries {len(found):5}/{len(expected)}  mismatched {len(diff)}')
+            for refid in diff[:args.show]:
+                print(f'  {refid}: single {expected[refid]}\n  {refid}: multi  {found.get(refid)}')
+            failed += len(diff) + len(expected.keys() ^ found.keys())
+    server.shutdown()
+    print(f'requests  single-language crawls {single}  multi-language crawl {multi}  saved {1 - multi / single:.0%}')
+    return failed
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Check that a multi-language crawl dumps the same entries as one crawl per language')
+    parser.add_argument('-n', '--breeds', type=int, default=100, help='Number of breeds')
+    parser.add_argument('-g', '--groups', type=int, default=10, help='Number of groups')
+    parser.add_argument('-l', '--languages', type=lambda s: s.split(','), default=['fr', 'de', 'es'],
+        help='Languages besides en, default is fr,de,es')
+    parser.add_argument('--rate', type=float, default=500, help='Requests per second')
+    parser.add_argument('--show', type=int, default=3, help='Mismatched entries to print per language')
+    args = parser.parse_args()
+    sys.exit(1 if main(args) else 0)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+import csv
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import template
+import genpage
+
+
+def legacy_entries(rows, fieldnames):
+    gens = dict(id=genpage.gen_id, url=genpage.gen_link, image=genpage.gen_link, pdf=genpage.gen_link)
+
+    def row_entries(row):
+        for k in fieldnames:
+            gen = gens.get(k, genpage.gen_)
+            yield gen(row, k)
+
+    rpl = '<div>\n&entries\n</div>'
+    return [template.format(rpl, entries=row_entries(row)) for row in rows]
+
+
+def compiled_entries(rows, fieldnames):
+    return list(map(genpage.compile_row(fieldnames), rows))
+
+
+def measure(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, res
+
+
+def main(args):
+    files = args.files or sorted(map(str, Path('.').glob('fci-breeds*.csv')))
+    print('%-22s %6s %12s %12s %8s %12s' % ('dataset', 'rows', 'before, ms', 'after, ms', 'speedup', 'page, ms'))
+    for fn in files:
+        with open(fn) as fp:
+            text = fp.read()
+        reader = csv.DictReader(io.StringIO(text))
+        fieldnames = list(reader.fieldnames)
+        rows = list(reader)
+
+        t0, r0 = measure(lambda: legacy_entries(rows, fieldnames), args.repeat)
+        t1, r1 = measure(lambda: compiled_entries(rows, fieldnames), args.repeat)
+        if r0 != r1:
+            raise Exception(f'{fn}: rows differ')
+
+        def page():
+            genpage.render(io.StringIO(text), io.StringIO(), lang=genpage.lang_of(fn), mode=args.mode)
+
+        t2, _ = measure(page, args.repeat)
+        print('%-22s %6d %12.2f %12.2f %7.2fx %12.2f' % (fn, len(rows), t0 * 1e3, t1 * 1e3, t0 / t1, t2 * 1e3))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Row and page rendering time per dataset')
+    parser.add_argument('files', nargs='*', help='CSV files, default is all fci-breeds*.csv')
+    parser.add_argument('-m', '--mode', choices=['static', 'virtual'], default='static', help='page mode')
+    parser.add_argument('-n', '--repeat', type=int, default=5, help='Repeat count, best time is reported')
+    args = parser.parse_args()
+    main(args)
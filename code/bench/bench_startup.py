@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+HEAVY = ['requests', 'lxml', 'core', 'crawl_fci', 'template', 'pyarrow', 'concurrent.futures']
+
+PROBE = '''
+import json, os, runpy, sys
+heavy = json.loads(sys.argv[2])
+sys.argv = json.loads(sys.argv[1])
+sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[0])))
+try:
+    runpy.run_path(sys.argv[0], run_name='__main__')
+except SystemExit:
+    pass
+print(json.dumps([m for m in heavy if m in sys.modules]), file=sys.__stderr__)
+'''
+
+CASES = [
+    ('legacy', 'export --help', ['crawler/export_fci.py', '--help']),
+    ('fci.py', 'export --help', ['fci.py', 'export', '--help']),
+    ('legacy', 'export fixtures', ['crawler/export_fci.py', '-i', str(FIXTURES / 'dump'), '/dev/null']),
+    ('fci.py', 'export fixtures', ['fci.py', 'export', '-i', str(FIXTURES / 'dump'), '/dev/null']),
+    ('legacy', 'render --help', ['genpage.py', '--help']),
+    ('fci.py', 'render --help', ['fci.py', 'render', '--help']),
+    ('legacy', 'crawl pl --help', ['crawler/crawl_pl.py', '--help']),
+    ('fci.py', 'crawl pl --help', ['fci.py', 'crawl', 'pl', '--help']),
+    ('fci.py', '--help', ['fci.py', '--help']),
+]
+
+
+def wall(argv, repeat):
+    times = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + argv, cwd=ROOT, capture_output=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def loaded(argv):
+    proc = subprocess.run([sys.executable, '-c', PROBE, json.dumps(argv), json.dumps(HEAVY)],
+        cwd=ROOT, capture_output=True, text=True)
+    return json.loads(proc.stderr.strip().splitlines()[-1])
+
+
+def importtime(argv):
+    proc = subprocess.run([sys.executable, '-X', 'importtime'] + argv, cwd=ROOT, capture_output=True, text=True)
+    total = 0
+    for line in proc.stderr.splitlines():
+        if line.startswith('import time:') and line.count('|') == 2:
+            _, cumulative, name = line.split('|')
+            if not name.startswith('  ') and cumulative.strip().isdigit():
+                total += int(cumulative)
+    return total / 1e6
+
+
+def main(repeat):
+    python = wall(['-c', 'pass'], repeat)
+    print(f'python startup {python * 1000:.1f}ms')
+    for kind, name, argv in CASES:
+        elapsed = wall(argv, repeat)
+        heavy = ','.join(loaded(argv)) or '-'
+        print(f'{kind:6}  {name:16}  wall {elapsed * 1000:7.1f}ms  imports {importtime(argv) * 1000:7.1f}ms  loaded {heavy}')
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compare startup and import time of the separate scripts and fci.py')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Runs per case, the median is reported')
+    args = parser.parse_args()
+    main(args.repeat)
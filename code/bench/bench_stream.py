@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'crawler'))
+
+import core
+from bench_suite import FIXTURES, load_pages, measure
+
+
+def tree(parser, r):
+    page = parser.getcontent(r)
+    return list(parser.links(page)), list(parser.items(page))
+
+
+def stream(parser, r, size=1 << 16):
+    links = list()
+    items = list()
+    for kind, value in parser.stream(core.chunked(r.content, size), r.url):
+        (links if kind == 'link' else items).append(value)
+    return links, items
+
+
+def first_item(parser, r, size=1 << 16):
+    start = time.perf_counter()
+    for kind, _ in parser.stream(core.chunked(r.content, size), r.url):
+        if kind == 'item':
+            return time.perf_counter() - start
+
+
+def main(fixtures, repeat, sizes):
+    failed = False
+    for name, parser, r in load_pages(fixtures):
+        if not parser.streaming:
+            continue
+        expected = tree(parser, r)
+        if not (expected[0] or expected[1]):
+            continue
+        for size in sizes:
+            if stream(parser, r, size) != expected:
+                print(f'MISMATCH {name} {r.url} chunk={size}', file=sys.stderr)
+                failed = True
+
+        tTree, _ = measure(lambda: tree(parser, r), repeat)
+        tStream, _ = measure(lambda: stream(parser, r), repeat)
+        tFirst = min(first_item(parser, r) or 0 for _ in range(repeat))
+        print(f'{name:4} {Path(r.url).name[:32]:32} links {len(expected[0]):4}  items {len(expected[1]):4}'
+            f'  tree {tTree * 1000:8.3f}ms  stream {tStream * 1000:8.3f}ms  first {tFirst * 1000:8.3f}ms')
+    return failed
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compare tree and streaming extraction of listing pages')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Repetitions per case')
+    parser.add_argument('--chunk', type=int, nargs='*', default=[7, 512, 1 << 16],
+        help='Chunk sizes to check the streaming output with')
+    parser.add_argument('--fixtures', default=FIXTURES, type=Path, help='Fixtures directory')
+    args = parser.parse_args()
+    sys.exit(1 if main(args.fixtures, args.repeat, args.chunk) else 0)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+import gc
+import io
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'crawler'))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import core
+import export_fci
+
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+
+def loops(fn, minTime):
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            res = fn()
+        if time.perf_counter() - start >= minTime:
+            return number, res
+        number *= 2
+
+
+def sample(fn, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - start) / number
+
+
+def measure(fn, repeat, minTime=0.05):
+    number, res = loops(fn, minTime)
+    gc.disable()
+    try:
+        times = [sample(fn, number) for _ in range(repeat)]
+    finally:
+        gc.enable()
+    return statistics.median(times), res
+
+
+def workload():
+    return sorted(str(i * 7919 % 10007) for i in range(20000))
+
+
+def calibrate(repeat):
+    elapsed, _ = measure(workload, repeat)
+    return elapsed
+
+
+def measure_relative(fn, repeat, minTime=0.05):
+    number, _ = loops(fn, minTime)
+    refNumber, _ = loops(workload, minTime)
+    times = list()
+    ratios = list()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            elapsed = sample(fn, number)
+            times.append(elapsed)
+            ratios.append(elapsed / sample(workload, refNumber))
+    finally:
+        gc.enable()
+    return statistics.median(times), statistics.median(ratios)
+
+
+def load_pages(fixtures):
+    from crawl_fci import FciParser
+    from crawl_pl import PlParser
+    from crawl_uk import UkParser
+
+    with open(fixtures / 'pages.json') as fp:
+        pages = json.load(fp)
+    parsers = dict(fci=FciParser(), pl=PlParser(), uk=UkParser())
+    res = list()
+    for page in pages:
+        parser = parsers[page['parser']]
+        r = core.make_response(page['url'], 200, {'Content-Type': 'text/html; charset=utf-8'},
+            (fixtures / page['file']).read_bytes())
+        res.append((page['parser'], parser, r))
+    return res
+
+
+def bench_parse(pages):
+    cases = dict()
+    for name, parser, r in pages:
+        content = parser.getcontent(r)
+        if name == 'fci' and not (parser.xpItems(content['body']) or parser.xpLinks(content['body'])):
+            kind = 'parse'
+            def run(parser=parser, r=r):
+                item = {'refid': '', 'url': r.url, '_partial': True}
+                return [parser.parse(item, parser.getcontent(r))]
+        else:
+            kind = 'items'
+            def run(parser=parser, r=r):
+                page = parser.getcontent(r)
+                return list(parser.items(page)) + parser.links(page)
+        cases.setdefault(f'parse.{name}.{kind}', list()).append(run)
+
+    for key, runs in sorted(cases.items()):
+        def run(runs=runs):
+            return [fn() for fn in runs]
+        yield key, run, dict(pages=len(runs), items=sum(len(x) for x in run()))
+
+
+def bench_export(dump, tmp):
+    rows = list(export_fci.iter_rows(dump))
+    fields = export_fci.FIELDS
+
+    yield 'export.read', lambda: list(export_fci.iter_rows(dump)), dict(rows=len(rows))
+
+    for format in ('csv', 'jsonl'):
+        writer = export_fci.WRITERS[format]
+        yield f'export.{format}', lambda writer=writer: writer(rows, fields, io.StringIO()), dict(rows=len(rows))
+
+    fn = Path(tmp) / 'fci-breeds.sqlite'
+    yield 'export.sqlite', lambda: export_fci.write_sqlite(rows, fields, fn), dict(rows=len(rows))
+
+
+def bench_render(dump):
+    import genpage
+
+    buf = io.StringIO()
+    export_fci.write_csv(export_fci.iter_rows(dump), export_fci.FIELDS, buf)
+    text = buf.getvalue()
+    nrows = text.count('\n') - 1
+
+    for mode in ('static', 'virtual'):
+        def run(mode=mode):
+            genpage.render(io.StringIO(text), io.StringIO(), lang='en', mode=mode)
+        yield f'render.{mode}', run, dict(rows=nrows)
+
+
+def timing(run, info, repeat):
+    elapsed, relative = measure_relative(run, repeat)
+    return elapsed / info.get('pages', 1), relative
+
+
+def main(args):
+    fixtures = Path(args.fixtures)
+    baseline = dict()
+    if Path(args.baseline).exists():
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)
+
+    calibration = calibrate(args.repeat)
+    scale = calibration / baseline['calibration']['time'] if 'calibration' in baseline else 1
+
+    def change(key, elapsed, relative):
+        base = baseline[key]
+        if 'relative' in base:
+            return relative / base['relative']
+        return elapsed / (base['time'] * scale)
+
+    def threshold(key):
+        return baseline.get(key, dict()).get('threshold', args.threshold)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = list(bench_parse(load_pages(fixtures)))
+        cases += bench_export(fixtures / 'dump', tmp)
+        cases += bench_render(fixtures / 'dump')
+
+        results = [(key, *timing(run, info, args.repeat), info) for key, run, info in cases]
+        ratios = {key: change(key, elapsed, relative) for key, elapsed, relative, _ in results if key in baseline}
+
+        for _ in range(args.confirm):
+            suspects = [(key, run, info) for key, run, info in cases if ratios.get(key, 0) > 1 + threshold(key)]
+            if not suspects:
+                break
+            for key, run, info in suspects:
+                ratios[key] = min(ratios[key], change(key, *timing(run, info, args.repeat)))
+
+    regressions = list()
+    print('machine speed vs baseline: %.2fx' % (1 / scale))
+    print('%-20s %6s %12s %12s %12s %8s' % ('case', 'count', 'time, us', 'baseline', 'per sec', 'change'))
+    for key, elapsed, relative, info in results:
+        count = info.get('pages') or info.get('rows')
+        diff = ''
+        if (base := baseline.get(key)):
+            diff = '%+.0f%%' % ((ratios[key] - 1) * 100)
+            if ratios[key] > 1 + threshold(key):
+                regressions.append(key)
+                diff += ' !'
+            if 'items' in info and info['items'] != base.get('items'):
+                regressions.append(key)
+                diff += ' items differ'
+        rate = (info.get('items') or info['rows']) / (elapsed * info.get('pages', 1))
+        print('%-20s %6d %12.1f %12s %12.0f %8s' % (key, count, elapsed * 1e6,
+            '%.1f' % (base['time'] * 1e6) if base else '-', rate, diff))
+
+    if args.save:
+        data = dict(calibration=dict(time=calibration))
+        for key, elapsed, relative, info in results:
+            data[key] = dict(time=elapsed, relative=relative, **info)
+            if 'threshold' in baseline.get(key, dict()):
+                data[key]['threshold'] = baseline[key]['threshold']
+        with open(args.baseline, 'w') as fp:
+            json.dump(data, fp, indent=2, sort_keys=True)
+        print(f'baseline saved to {args.baseline}', file=sys.stderr)
+    elif regressions:
+        print(f'regressed: {", ".join(regressions)}', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Offline benchmarks for parsers, export and page generation over fixtures')
+    parser.add_argument('--fixtures', default=str(FIXTURES), help='Fixture directory with pages.json and dump/')
+    parser.add_argument('--baseline', default=str(BASELINE), help='Baseline file to compare with')
+    parser.add_argument('--save', action='store_true', help='Store the results as the new baseline, keeping per-case thresholds')
+    parser.add_argument('-t', '--threshold', type=float, default=0.25,
+        help='Allowed slowdown before failing, 0.25 is 25%%; a "threshold" in a baseline case overrides it')
+    parser.add_argument('-n', '--repeat', type=int, default=9, help='Repeat count, median time is reported')
+    parser.add_argument('--confirm', type=int, default=2,
+        help='Measure slow cases again this many times, fail only if every round is slow')
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'crawler'))
+
+import core
+import fci_site
+
+
+CRAWLER = Path(__file__).resolve().parent.parent / 'crawler' / 'crawl_fci.py'
+
+
+def run(url, basedir, workers, options, kill=None):
+    cmd = [sys.executable, str(CRAWLER), '--shared', '--url', url, '-o', str(basedir)] + options
+    procs = [subprocess.Popen(cmd, stderr=subprocess.DEVNULL) for _ in range(workers)]
+    if kill:
+        time.sleep(kill)
+        procs[0].kill()
+    for proc in procs:
+        proc.wait()
+    return [proc.returncode for proc in procs]
+
+
+def entries(basedir):
+    todir = Path(basedir) / 'fci'
+    if (fn := todir / 'dump.sqlite').is_file():
+        return {key for key, _ in core.DumpStore(fn).items()}
+    res = set()
+    for fn in todir.glob('dump/*/entry.json'):
+        with open(fn) as fp:
+            res.add(json.load(fp)['refid'])
+    return res
+
+
+def main(args):
+    site = fci_site.FciSite(breeds=args.breeds, groups=args.groups)
+    options = ['--rate', str(args.rate)] + (['--store'] if args.store else [])
+    base = None
+    for n in args.workers:
+        server = fci_site.serve(site=site, latency=args.latency, jitter=args.jitter,
+            errorRate=args.error_rate, seed=args.seed)
+        url = f'{server.url}en/nomenclature/'
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            codes = run(url, tmp, n, options, kill=args.kill)
+            elapsed = time.perf_counter() - start
+            found = entries(tmp)
+            queue = core.WorkQueue(Path(tmp) / 'fci' / f'fci-{core.SharedState.fileName}')
+            stats = queue.stats()
+            queue.close()
+        server.shutdown()
+        base = base or elapsed
+        print(f'workers {n:2}  time {elapsed:7.2f}s  speedup {base / elapsed:5.2f}x  requests {server.stats.requests:6}'
+            f'  entries {len(found):5}/{site.breeds}  queue {stats}  exit {codes}')
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Crawl a local FCI site simulator with several processes sharing one work queue')
+    parser.add_argument('-w', '--workers', type=int, nargs='*', default=[1, 2, 4], help='Numbers of worker processes to try')
+    parser.add_argument('-n', '--breeds', type=int, default=1000, help='Number of breeds')
+    parser.add_argument('-g', '--groups', type=int, default=40, help='Number of groups')
+    parser.add_argument('--rate', type=float, default=50, help='Requests per second of each worker')
+    parser.add_argument('--store', action='store_true', help='Dump entries into a single SQLite store')
+    parser.add_argument('--latency', type=float, default=0.01, help='Server delay before each response, seconds')
+    parser.add_argument('--jitter', type=float, default=0, help='Random extra server delay, seconds')
+    parser.add_argument('--error-rate', type=float, default=0, help='Share of requests answered with 500 or 503')
+    parser.add_argument('--seed', type=int, help='Random seed for latency and errors')
+    parser.add_argument('--kill', type=float, metavar='SECONDS', help='Kill the first worker after this many seconds')
+    args = parser.parse_args()
+    main(args)
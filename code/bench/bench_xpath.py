@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'crawler'))
+
+import core
+from crawl_fci import FciParser
+
+
+def legacy_items(parser, page):
+    return [parser.item(x, page['url']) for x in page['body'].xpath('//td[contains(@class, "race")]/a[contains(@class, "nom")]')]
+
+
+def legacy_links(parser, page):
+    return [urljoin(page['url'], x) for x in page['body'].xpath('//div[contains(@class, "group")]/a/@href')]
+
+
+def legacy_parse(parser, item, page):
+    lang = parser.language.upper()
+    body = page['body']
+    exslt = {'re': 'http://exslt.org/regular-expressions'}
+
+    def text(xpath):
+        el = ' '.join([s.strip() for s in body.xpath(xpath, namespaces=exslt)])
+        if el:
+            return el.strip()
+
+    def clean_group(text):
+        if text:
+            ps = text.split('-')
+            text = ps[len(ps) > 1]
+            return text.split('(')[0].strip()
+
+    def url(xpath, skip=None):
+        for el in body.xpath(xpath, namespaces=exslt):
+            s = el.strip()
+            if not (skip and skip(s)):
+                return urljoin(page['url'], s)
+
+    item['name'] = text(f'//span[re:match(@id,"ContentPlaceHolder1_Nom{lang}Label","i")]/text()')
+    item['group'] = clean_group(text('//a[@id="ContentPlaceHolder1_GroupeHyperLink"]//text()'))
+    item['section'] = text('//span[@id="ContentPlaceHolder1_SectionLabel"]/text()')
+    item['country'] = text('//span[@id="ContentPlaceHolder1_PaysOrigineLabel"]/text()')
+    del item['_partial']
+
+    def stdana(s): return s.startswith('/Nomenclature/Illustrations/STD-ANA-')
+    imgUrl = url('//img[@id="ContentPlaceHolder1_IllustrationsRepeater_Image1_0"]/@src', stdana)
+    if imgUrl: item['thumb'] = imgUrl
+
+    pdfUrl = url(f'//a[re:match(@id,"ContentPlaceHolder1_Standard{lang}HyperLink","i")]/@href')
+    if pdfUrl: item['pdf'] = pdfUrl
+
+    provDate = text('//span[@id="ContentPlaceHolder1_DateReconnaissanceProvisoireLabel"]/text()')
+    status = text('//span[@id="ContentPlaceHolder1_StatutLabel"]/text()')
+    if 'provis' in status.lower() and provDate: item['provisional'] = provDate
+
+    return item
+
+
+def measure(fn, pages, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = [fn(page) for page in pages]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, res
+
+
+def main(args):
+    archive = core.ResponseArchive(args.archive)
+    parser = FciParser(language=args.language)
+    pages = list()
+    for url in archive.urls():
+        r = archive.get(url)
+        if r.status_code == 200:
+            pages.append(parser.getcontent(r))
+
+    listing = [p for p in pages if parser.xpItems(p['body']) or parser.xpLinks(p['body'])]
+    detail = [p for p in pages if parser.xpSpan(p['body'], id='ContentPlaceHolder1_StatutLabel')]
+
+    def item(page): return {'refid': '', 'url': page['url'], '_partial': True}
+
+    cases = [
+        ('items', listing, lambda p: legacy_items(parser, p), parser.items),
+        ('links', listing, lambda p: legacy_links(parser, p), parser.links),
+        ('parse', detail, lambda p: legacy_parse(parser, item(p), p), lambda p: parser.parse(item(p), p)),
+    ]
+
+    print('%-6s %6s %12s %12s %8s' % ('case', 'pages', 'before, us', 'after, us', 'speedup'))
+    for name, sample, before, after in cases:
+        if not sample:
+            continue
+        t0, r0 = measure(before, sample, args.repeat)
+        t1, r1 = measure(after, sample, args.repeat)
+        if r0 != r1:
+            raise Exception(f'{name}: results differ')
+        n = len(sample)
+        print('%-6s %6d %12.1f %12.1f %7.2fx' % (name, n, t0 / n * 1e6, t1 / n * 1e6, t0 / t1))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Per-page XPath extraction time over archived pages')
+    parser.add_argument('archive', help='Response archive directory, e.g. data/fci/archive')
+    parser.add_argument('-l', '--language', default='en', help='Language identifier, en|fr|de|es')
+    parser.add_argument('-n', '--repeat', type=int, default=5, help='Repeat count, best time is reported')
+    args = parser.parse_args()
+    main(args)
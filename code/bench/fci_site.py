@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+import hashlib
+import html
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+GROUPS = [
+    'Sheepdogs and Cattledogs', 'Pinscher and Schnauzer - Molossoid and Swiss Mountain and Cattledogs',
+    'Terriers', 'Dachshunds', 'Spitz and primitive types', 'Scent hounds and related breeds',
+    'Pointing Dogs', 'Retrievers - Flushing Dogs - Water Dogs', 'Companion and Toy Dogs', 'Sighthounds',
+]
+
+COUNTRIES = [
+    'GREAT BRITAIN', 'FRANCE', 'GERMANY', 'SPAIN', 'ITALY', 'HUNGARY', 'BELGIUM', 'JAPAN', 'IRELAND', 'POLAND',
+]
+
+WORDS = [
+    'ENGLISH', 'WIRE-HAIRED', 'SMOOTH', 'LARGE', 'SMALL', 'BLUE', 'MOUNTAIN', 'WATER', 'SHORT-HAIRED', 'ROUGH',
+]
+
+KINDS = ['POINTER', 'SETTER', 'SPANIEL', 'TERRIER', 'HOUND', 'SHEEPDOG', 'RETRIEVER', 'SPITZ', 'GRIFFON', 'MASTIFF']
+
+
+class FciSite:
+    def __init__(self, breeds=360, groups=10, sections=3, assetSize=20000, languages=('en', 'fr', 'de', 'es')):
+        self.breeds = breeds
+        self.groups = groups
+        self.sections = sections
+        self.assetSize = assetSize
+        self.languages = languages
+
+    def breed(self, i):
+        name = f'{WORDS[i % len(WORDS)]} {KINDS[i // len(WORDS) % len(KINDS)]} {i}'
+        return {
+            'id': i,
+            'name': name,
+            'slug': re.sub(r'[^A-Z0-9]+', '-', name),
+            'group': i % self.groups + 1,
+            'section': i // self.groups % self.sections + 1,
+            'country': COUNTRIES[i % len(COUNTRIES)],
+            'provisional': '12/07/2021' if i % 17 == 0 else None,
+            'image': i % 11 != 0,
+        }
+
+    def group_name(self, g, lang='en'):
+        return self.local(GROUPS[(g - 1) % len(GROUPS)], lang)
+
+    def local(self, text, lang):
+        return text if lang == 'en' else f'{text} {lang.upper()}'
+
+    def group_links(self, lang):
+        return ''.join(f'<div class="group"><a href="/{lang}/nomenclature/groupe.aspx?id={g}">'
+            f'Group {g} - {html.escape(self.group_name(g, lang))} (Section 1 - {self.sections})</a></div>\n'
+            for g in range(1, self.groups + 1))
+
+    def index(self, lang):
+        return (f'<!DOCTYPE html>\n<html lang="{lang}"><head><meta charset="utf-8"><title>FCI Nomenclature</title></head><body>\n'
+            f'<div id="groups">\n{self.group_links(lang)}</div>\n</body></html>\n')
+
+    def group(self, lang, g):
+        rows = list()
+        for i in range(g - 1 if g > 1 else self.groups, self.breeds + 1, self.groups):
+            b = self.breed(i)
+            rows.append(f'<tr><td class="race"><a class="nom" href="/{lang}/nomenclature/{b["slug"]}-{i}.html">'
+                f'{html.escape(b["name"])} ({i})</a></td><td class="pays">{self.local(b["country"], lang)}</td></tr>\n')
+        return (f'<!DOCTYPE html>\n<html lang="{lang}"><head><meta charset="utf-8"><title>FCI Group {g}</title></head><body>\n'
+            f'{self.group_links(lang)}<table class="races">\n{"".join(rows)}</table>\n</body></html>\n')
+
+    def detail(self, lang, i):
+        b = self.breed(i)
+        names = ''.join(f'<span id="ContentPlaceHolder1_Nom{x.upper()}Label">{html.escape(b["name"])}'
+            f'{"" if x == "en" else " " + x.upper()}</span>\n' for x in self.languages)
+        pdfs = ''.join(f'<a id="ContentPlaceHolder1_Standard{x.upper()}HyperLink" '
+            f'href="/Nomenclature/Standards/{i:03}g{b["group"]:02}-{x}.pdf">{x.upper()}</a>\n' for x in self.languages)
+        image = f'{i:03}g{b["group"]:02}.jpg' if b['image'] else 'STD-ANA-0.jpg'
+        status = 'Provisional acceptance' if b['provisional'] else 'Definitive acceptance'
+        section = self.local(f'Section {b["section"]} of group {b["group"]}', lang)
+        return (f'<!DOCTYPE html>\n<html lang="{lang}"><head><meta charset="utf-8"><title>{html.escape(b["name"])}</title></head><body>\n'
+            f'<div class="fiche">\n{names}'
+            f'<a id="ContentPlaceHolder1_GroupeHyperLink" href="/{lang}/nomenclature/groupe.aspx?id={b["group"]}">'
+            f'Group {b["group"]} - {html.escape(self.group_name(b["group"], lang))} (Section {b["section"]})</a>\n'
+            f'<span id="ContentPlaceHolder1_SectionLabel">{html.escape(section)}</span>\n'
+            f'<span id="ContentPlaceHolder1_PaysOrigineLabel">{self.local(b["country"], lang)}</span>\n'
+            f'<span id="ContentPlaceHolder1_StatutLabel">{status}</span>\n'
+            f'<span id="ContentPlaceHolder1_DateReconnaissanceProvisoireLabel">{b["provisional"] or ""}</span>\n'
+            f'<img id="ContentPlaceHolder1_IllustrationsRepeater_Image1_0" src="/Nomenclature/Illustrations/{image}">\n'
+            f'{pdfs}</div>\n</body></html>\n')
+
+    def asset(self, name):
+        seed = hashlib.sha256(name.encode()).digest()
+        return (seed * (self.assetSize // len(seed) + 1))[:self.assetSize]
+
+    def route(self, url):
+        parts = urlsplit(url)
+        path = parts.path
+        if (m := re.fullmatch(r'/(\w\w)/nomenclature/', path)) and m.group(1) in self.languages:
+            return 'text/html; charset=utf-8', self.index(m.group(1)).encode()
+        if (m := re.fullmatch(r'/(\w\w)/nomenclature/groupe\.aspx', path)) and m.group(1) in self.languages:
+            g = parse_qs(parts.query).get('id', ['0'])[0]
+            if g.isdigit() and 1 <= int(g) <= self.groups:
+                return 'text/html; charset=utf-8', self.group(m.group(1), int(g)).encode()
+        if (m := re.fullmatch(r'/(\w\w)/nomenclature/[A-Z0-9-]+-(\d+)\.html', path)) and m.group(1) in self.languages:
+            if 1 <= (i := int(m.group(2))) <= self.breeds:
+                return 'text/html; charset=utf-8', self.detail(m.group(1), i).encode()
+        if (m := re.fullmatch(r'/Nomenclature/(Illustrations|Standards)/([\w.-]+)', path)):
+            kind = 'image/jpeg' if m.group(1) == 'Illustrations' else 'application/pdf'
+            return kind, self.asset(m.group(2))
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes = 0
+        self.statuses = dict()
+
+    def add(self, status, size):
+        with self.lock:
+            self.requests += 1
+            self.bytes += size
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def report(self):
+        codes = ', '.join(f'{k}: {v}' for k, v in sorted(self.statuses.items()))
+        return f'requests: {self.requests}, bytes: {self.bytes}, {codes}'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_HEAD(self):
+        self.respond(body=False)
+
+    def do_GET(self):
+        self.respond()
+
+    def respond(self, body=True):
+        server = self.server
+        with server.lock:
+            roll = server.random.random()
+            latency = server.latency + server.random.uniform(0, server.jitter)
+            error = server.random.choice((500, 503))
+        if latency:
+            time.sleep(latency)
+
+        if roll < server.throttleRate:
+            return self.send(429, b'Too Many Requests', headers={'Retry-After': str(server.retryAfter)})
+        if roll < server.throttleRate + server.errorRate:
+            return self.send(error, b'Server Error')
+
+        found = server.site.route(self.path)
+        if not found:
+            return self.send(404, b'Not Found')
+        kind, data = found
+
+        etag = '"%s"' % hashlib.sha1(data).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            return self.send(304, b'', headers={'ETag': etag})
+
+        rng = re.fullmatch(r'bytes=(\d+)-', self.headers.get('Range') or '')
+        if rng and self.headers.get('If-Range') in (None, etag) and int(rng.group(1)) < len(data):
+            start = int(rng.group(1))
+            headers = {'ETag': etag, 'Content-Range': f'bytes {start}-{len(data) - 1}/{len(data)}'}
+            return self.send(206, data[start:], kind=kind, headers=headers, body=body)
+        self.send(200, data, kind=kind, headers={'ETag': etag, 'Accept-Ranges': 'bytes'}, body=body)
+
+    def send(self, status, data, kind='text/plain; charset=utf-8', headers=None, body=True):
+        self.send_response(status)
+        self.send_header('Content-Type', kind)
+        self.send_header('Content-Length', str(len(data)))
+        for k, v in (headers or dict()).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if body and data:
+            self.wfile.write(data)
+        self.server.stats.add(status, len(data) if body else 0)
+
+
+class SiteServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, site, latency=0, jitter=0, errorRate=0, throttleRate=0, retryAfter=1,
+            seed=None, verbose=False):
+        super().__init__(address, Handler)
+        self.site = site
+        self.latency = latency
+        self.jitter = jitter
+        self.errorRate = errorRate
+        self.throttleRate = throttleRate
+        self.retryAfter = retryAfter
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.verbose = verbose
+        self.stats = Stats()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/'
+
+
+def serve(host='127.0.0.1', port=0, site=None, **options):
+    server = SiteServer((host, port), site or FciSite(), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(args):
+    site = FciSite(breeds=args.breeds, groups=args.groups, assetSize=args.asset_size)
+    server = SiteServer((args.host, args.port), site, latency=args.latency, jitter=args.jitter,
+        errorRate=args.error_rate, throttleRate=args.throttle_rate, retryAfter=args.retry_after,
+        seed=args.seed, verbose=args.verbose)
+    print(f'serving {site.breeds} breeds at {server.url}en/nomenclature/', file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(server.stats.report(), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Local stand-in for the FCI nomenclature site, for crawler load tests')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('-p', '--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('-n', '--breeds', type=int, default=360, help='Number of breeds')
+    parser.add_argument('-g', '--groups', type=int, default=10, help='Number of groups')
+    parser.add_argument('--asset-size', type=int, default=20000, help='Size of images and PDFs, bytes')
+    parser.add_argument('--latency', type=float, default=0, help='Delay before each response, seconds')
+    parser.add_argument('--jitter', type=float, default=0, help='Random extra delay, up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0, help='Share of requests answered with 500 or 503')
+    parser.add_argument('--throttle-rate', type=float, default=0, help='Share of requests answered with 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After value of 429 responses, seconds')
+    parser.add_argument('--seed', type=int, help='Random seed for latency and errors')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+import gzip
+import json
+import re
+from html.parser import HTMLParser
+
+
+class ElementCounter(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def handle_starttag(self, tag, attrs):
+        self.count += 1
+
+
+def stats(fn, viewport, rowHeight, overscan):
+    with open(fn, 'rb') as fp:
+        data = fp.read()
+    text = data.decode()
+    counter = ElementCounter()
+    counter.feed(text)
+    nodes = counter.count
+
+    if (m := re.search(r'<script type="application/json" id="vdata">(.*?)</script>', text, re.S)):
+        payload = json.loads(m.group(1))
+        shown = min(len(payload['rows']), -(-viewport // rowHeight) + 2 * overscan)
+        links = {'url', 'image', 'pdf', 'id'}
+        perRow = 1 + len(payload['fields'])
+        perRow += sum(1 for i, k in enumerate(payload['fields']) if k in links)
+        nodes += shown * perRow
+
+    return len(data), len(gzip.compress(data, 9)), counter.count, nodes
+
+
+def main(args):
+    print('%-28s %10s %10s %10s %10s' % ('page', 'size, KB', 'gzip, KB', 'elements', 'live DOM'))
+    for fn in args.files:
+        size, packed, elements, nodes = stats(fn, args.viewport, args.row_height, args.overscan)
+        print('%-28s %10.1f %10.1f %10d %10d' % (fn, size / 1024, packed / 1024, elements, nodes))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Page weight and DOM node count of generated pages')
+    parser.add_argument('files', nargs='+', help='HTML pages to measure')
+    parser.add_argument('--viewport', type=int, default=900, help='viewport height in px, for virtual pages')
+    parser.add_argument('--row-height', type=int, default=24, help='row height in px, for virtual pages')
+    parser.add_argument('--overscan', type=int, default=10, help='rows rendered above and below the viewport')
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+"""
+author: paiv, https://github.com/paiv/
+"""
+
+import array
+import bisect
+import itertools
+import mmap
+import os
+import struct
+import sys
+from functools import lru_cache
+from pathlib import Path
+from export_fci import FIELDS, INDEXED, load
+
+
+MAGIC = b'FCIX'
+VERSION = 1
+HEADER = struct.Struct('<4sHHHHIII')
+SNAPSHOT_SUFFIX = '.fcix'
+
+
+@lru_cache
+def record_type(fields):
+    def __init__(self, *values):
+        for k, v in zip(fields, values):
+            setattr(self, k, v)
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__, ', '.join(f'{k}={getattr(self, k)!r}' for k in fields))
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.astuple() == other.astuple()
+
+    def astuple(self):
+        return tuple(getattr(self, k) for k in fields)
+
+    def asdict(self):
+        return {k: getattr(self, k) for k in fields}
+
+    return type('Breed', (), dict(__slots__=fields, __init__=__init__, __repr__=__repr__, __eq__=__eq__,
+        __hash__=None, astuple=astuple, asdict=asdict, fields=fields))
+
+
+Breed = record_type(tuple(FIELDS))
+
+
+def _ints(code, values):
+    a = array.array(code, values)
+    if sys.byteorder == 'big':
+        a.byteswap()
+    return a.tobytes()
+
+
+def snapshot(rows, fields=FIELDS, indexed=INDEXED):
+    fields = list(fields)
+    rows = sorted(rows, key=lambda row: int(row['id']))
+    indexed = [i for i, k in enumerate(fields) if k in indexed]
+    ref = fields.index('id')
+
+    strings = set(fields)
+    for row in rows:
+        strings.update(str(row[k]) for k in fields if k != 'id' and row.get(k) is not None)
+    strings = sorted(strings)
+    sids = {s: i for i, s in enumerate(strings)}
+
+    blobs = [s.encode() for s in strings]
+    offsets = list(itertools.accumulate((len(b) for b in blobs), initial=0))
+    blob = b''.join(blobs)
+
+    ids = [int(row['id']) for row in rows]
+    columns = list()
+    for row in rows:
+        for i, k in enumerate(fields):
+            v = row.get(k)
+            if i == ref:
+                columns.append(int(v))
+            else:
+                columns.append(-1 if v is None else sids[str(v)])
+
+    parts = [
+        HEADER.pack(MAGIC, VERSION, len(fields), len(indexed), ref, len(rows), len(strings), len(blob)),
+        _ints('i', [sids[k] for k in fields]),
+        _ints('i', indexed),
+        _ints('I', offsets),
+        _ints('i', ids),
+        _ints('i', columns),
+    ]
+    for col in indexed:
+        postings = dict()
+        for pos in range(len(rows)):
+            if (sid := columns[pos * len(fields) + col]) >= 0:
+                postings.setdefault(sid, list()).append(pos)
+        keys = sorted(postings)
+        starts = list(itertools.accumulate((len(postings[k]) for k in keys), initial=0))
+        parts.append(struct.pack('<I', len(keys)))
+        parts.append(_ints('i', keys))
+        parts.append(_ints('I', starts))
+        parts.append(_ints('I', [pos for k in keys for pos in postings[k]]))
+    parts.append(blob)
+    return b''.join(parts)
+
+
+class BreedIndex:
+    def __init__(self, buffer, mapped=None):
+        self.buffer = buffer
+        self.mapped = mapped
+        self.view = memoryview(buffer)
+        self.views = [self.view]
+        magic, version, nfields, nindexed, ref, count, nstrings, blobSize = HEADER.unpack_from(self.view)
+        if magic != MAGIC:
+            raise Exception('not a breed index snapshot')
+        if version != VERSION:
+            raise Exception(f'unsupported breed index version {version}')
+        self.offset = HEADER.size
+        self.count = count
+        self.ref = ref
+        fieldIds = self._take('i', nfields)
+        indexedCols = self._take('i', nindexed)
+        self.offsets = self._take('I', nstrings + 1)
+        self.ids = self._take('i', count)
+        self.columns = self._take('i', count * nfields)
+        self.indexes = dict()
+        for col in indexedCols:
+            nkeys, = struct.unpack_from('<I', self.view, self.offset)
+            self.offset += 4
+            keys = self._take('i', nkeys)
+            starts = self._take('I', nkeys + 1)
+            postings = self._take('I', starts[-1] if nkeys else 0)
+            self.indexes[col] = (keys, starts, postings)
+        self.blobStart = self.offset
+        if len(self.view) < self.blobStart + blobSize:
+            raise Exception('truncated breed index snapshot')
+        self.strings = dict()
+        self.fields = tuple(self.string(i) for i in fieldIds)
+        self.columnOf = {k: i for i, k in enumerate(self.fields)}
+        self.indexes = {self.fields[col]: index for col, index in self.indexes.items()}
+        self.interned = {self.columnOf[k] for k in self.indexes}
+        self.record = Breed if self.fields == Breed.fields else record_type(self.fields)
+        self.records = dict()
+
+    def _take(self, code, n):
+        size = 4 * n
+        with self.view[self.offset:self.offset + size] as part:
+            self.offset += size
+            if sys.byteorder == 'big':
+                a = array.array(code, part.tobytes())
+                a.byteswap()
+                return a
+            view = part.cast(code)
+        self.views.append(view)
+        return view
+
+    @classmethod
+    def build(cls, rows, fields=FIELDS, indexed=INDEXED):
+        return cls(snapshot(rows, fields=fields, indexed=indexed))
+
+    @classmethod
+    def from_file(cls, fn, format=None):
+        rows = load(fn, format)
+        fields = list(rows[0]) if rows else FIELDS
+        return cls.build(rows, fields=fields)
+
+    @classmethod
+    def load(cls, fn):
+        with open(fn, 'rb') as fp:
+            mapped = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped, mapped=mapped)
+
+    def save(self, fn):
+        fn = Path(fn)
+        tmp = fn.with_name(fn.name + '.tmp')
+        with open(tmp, 'wb') as fp:
+            fp.write(self.view)
+        os.replace(tmp, fn)
+
+    def close(self):
+        self.records.clear()
+        self.indexes = dict()
+        for view in reversed(self.views):
+            view.release()
+        self.views = list()
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def string(self, sid):
+        if (s := self.strings.get(sid)) is None:
+            start = self.blobStart
+            s = self.buffer[start + self.offsets[sid]:start + self.offsets[sid + 1]].decode()
+            self.strings[sid] = s
+        return s
+
+    def sid(self, value):
+        if not isinstance(value, str):
+            return None
+        n = len(self.offsets) - 1
+        i = bisect.bisect_left(range(n), value, key=self.string)
+        if i < n and self.string(i) == value:
+            return i
+
+    def at(self, pos):
+        if (rec := self.records.get(pos)) is None:
+            nfields = len(self.fields)
+            row = self.columns[pos * nfields:(pos + 1) * nfields].tolist()
+            values = list()
+            for i, sid in enumerate(row):
+                if i == self.ref:
+                    values.append(sid)
+                elif sid < 0:
+                    values.append(None)
+                elif i in self.interned:
+                    values.append(sys.intern(self.string(sid)))
+                else:
+                    values.append(self.string(sid))
+            rec = self.record(*values)
+            self.records[pos] = rec
+        return rec
+
+    def position(self, id):
+        i = bisect.bisect_left(self.ids, id)
+        if i < self.count and self.ids[i] == id:
+            return i
+
+    def get(self, id, default=None):
+        if (pos := self.position(int(id))) is None:
+            return default
+        return self.at(pos)
+
+    def __getitem__(self, id):
+        if (pos := self.position(int(id))) is None:
+            raise KeyError(id)
+        return self.at(pos)
+
+    def __contains__(self, id):
+        return self.position(int(id)) is not None
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for pos in range(self.count):
+            yield self.at(pos)
+
+    def values(self, field):
+        keys, _, _ = self._index(field)
+        return [self.string(sid) for sid in keys]
+
+    def positions(self, field, value):
+        keys, starts, postings = self._index(field)
+        if (sid := self.sid(value)) is None:
+            return list()
+        i = bisect.bisect_left(keys, sid)
+        if i < len(keys) and keys[i] == sid:
+            return postings[starts[i]:starts[i + 1]].tolist()
+        return list()
+
+    def find(self, **criteria):
+        found = None
+        for field, value in criteria.items():
+            positions = self.positions(field, value)
+            found = set(positions) if found is None else found.intersection(positions)
+            if not found:
+                return list()
+        if found is None:
+            return list(self)
+        return [self.at(pos) for pos in sorted(found)]
+
+    def count_of(self, field):
+        keys, starts, _ = self._index(field)
+        return {self.string(sid): starts[i + 1] - starts[i] for i, sid in enumerate(keys)}
+
+    def _index(self, field):
+        if (index := self.indexes.get(field)) is None:
+            raise KeyError(f'{field} is not indexed, indexed fields are: ' + ', '.join(self.indexes))
+        return index
+
+
+def open_index(fn, format=None):
+    if Path(fn).suffix == SNAPSHOT_SUFFIX:
+        return BreedIndex.load(fn)
+    return BreedIndex.from_file(fn, format)
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Build and query a breed index snapshot')
+    parser.add_argument('-o', '--output', metavar='FILE', help=f'Save a {SNAPSHOT_SUFFIX} snapshot of the input')
+    parser.add_argument('--id', type=int, action='append', help='Print the breed with this id')
+    parser.add_argument('--group', help='Filter by group')
+    parser.add_argument('--section', help='Filter by section')
+    parser.add_argument('--country', help='Filter by country')
+    parser.add_argument('--values', choices=INDEXED, help='Print distinct values of a field with breed counts')
+    parser.add_argument('file', nargs='?', default='fci-breeds.csv',
+        help=f'CSV, JSONL, SQLite, Parquet or Arrow export, or a {SNAPSHOT_SUFFIX} snapshot')
+    args = parser.parse_args()
+
+    with open_index(args.file) as index:
+        if args.output:
+            index.save(args.output)
+            print(f'{len(index)} breeds', file=sys.stderr)
+
+        def show(rec):
+            print(json.dumps(rec.asdict(), ensure_ascii=False))
+
+        if args.values:
+            for value, n in index.count_of(args.values).items():
+                print(f'{n:4} {value}')
+        for id in args.id or list():
+            if (rec := index.get(id)) is None:
+                print(f'{id} not found', file=sys.stderr)
+            else:
+                show(rec)
+        criteria = {k: v for k in INDEXED if (v := getattr(args, k))}
+        if criteria:
+            for rec in index.find(**criteria):
+                show(rec)
@@ -1 +1,32 @@
-from .crawler import *
+import importlib
+
+
+EXPORTS = {
+    'archive': ['ResponseArchive'],
+    'assets': ['AssetDownloader', 'AssetStore', 'CHUNK_SIZE'],
+    'crawler': ['Crawler', 'CrawlerState', 'Dumper', 'NETWORK_ERROR', 'Parser', 'RETRY_STATUSES', 'jsondump', 'retry_after'],
+    'frontier': ['DEFAULT_PORTS', 'Frontier', 'normalize_url'],
+    'httpcache': ['HttpCache', 'make_response'],
+    'journal': ['JournalState'],
+    'metrics': ['BYTES', 'Histogram', 'Metrics', 'Progress', 'SECONDS'],
+    'options': ['add_crawler_arguments', 'crawler_options'],
+    'pipeline': ['Content', 'Pipeline'],
+    'selectors': ['EXSLT', 'xpath'],
+    'store': ['DumpStore'],
+    'stream': ['chunked', 'stream_roots'],
+    'workqueue': ['ABANDONED', 'DONE', 'LEASED', 'QUEUED', 'SharedFrontier', 'SharedState', 'WorkQueue'],
+}
+
+_modules = {name: module for module, names in EXPORTS.items() for name in names}
+
+
+def __getattr__(name):
+    if (module := _modules.get(name)) is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_modules))
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+author: paiv, https://github.com/paiv/
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from .httpcache import HttpCache, make_response
+
+
+class ResponseArchive:
+    def __init__(self, dir):
+        self.archiveDir = Path(dir)
+        self.indexFile = self.archiveDir / 'index.jsonl'
+        self.index = dict()
+        self.lock = threading.Lock()
+        self._load()
+
+    def urls(self):
+        return list(self.index)
+
+    def get(self, url):
+        if (meta := self.index.get(url)) is None:
+            return None
+        with gzip.open(self._path(meta['hash']), 'rb') as fp:
+            content = fp.read()
+        return make_response(meta['url'], meta['status'], meta['headers'], content)
+
+    def put(self, url, r):
+        content = r.content or b''
+        digest = hashlib.sha256(content).hexdigest()
+        meta = {
+            'request': url,
+            'url': r.url,
+            'status': r.status_code,
+            'headers': {k: v for k, v in r.headers.items() if k.lower() not in HttpCache.skipHeaders},
+            'hash': digest,
+        }
+        fn = self._path(digest)
+        with self.lock:
+            if self.index.get(url) == meta:
+                return r
+            if not fn.is_file():
+                if not fn.parent.is_dir():
+                    fn.parent.mkdir(parents=True)
+                tmp = fn.with_name(fn.name + '.tmp')
+                with gzip.open(tmp, 'wb', compresslevel=9) as fp:
+                    fp.write(content)
+                os.replace(tmp, fn)
+            with open(self.indexFile, 'a') as fp:
+                fp.write(json.dumps(meta, ensure_ascii=False, sort_keys=True))
+                fp.write('\n')
+            self.index[url] = meta
+        return r
+
+    def _load(self):
+        if not self.archiveDir.is_dir():
+            self.archiveDir.mkdir(parents=True)
+        if self.indexFile.is_file():
+            with open(self.indexFile, 'r') as fp:
+                for line in fp:
+                    try:
+                        meta = json.loads(line)
+                    except ValueError:
+                        break
+                    self.index[meta['request']] = meta
+
+    def _path(self, digest):
+        return self.archiveDir / 'objects' / digest[:2] / (digest + '.gz')
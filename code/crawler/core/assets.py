@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+"""
+author: paiv, https://github.com/paiv/
+"""
+
+import hashlib
+import json
+import os
+import requests
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+from .ratelimit import HostRateLimiter, DEFAULT_RATE
+
+
+CHUNK_SIZE = 1 << 16
+
+
+class AssetStore:
+    def __init__(self, dir):
+        self.assetDir = Path(dir)
+        self.indexFile = self.assetDir / 'index.jsonl'
+        self.index = dict()
+        self.lock = threading.Lock()
+        self._load()
+
+    def get(self, url):
+        return self.index.get(url)
+
+    def path(self, url):
+        if (meta := self.index.get(url)):
+            return self.assetDir / meta['path']
+
+    def partial(self, url):
+        key = hashlib.sha1(url.encode()).hexdigest()
+        return self.assetDir / 'partial' / (key + '.part')
+
+    def put(self, url, tmp, digest, size, headers):
+        ext = Path(urlsplit(url).path).suffix.lower()
+        fn = self.assetDir / 'objects' / digest[:2] / (digest + ext)
+        meta = {
+            'url': url,
+            'path': str(fn.relative_to(self.assetDir)),
+            'hash': digest,
+            'size': size,
+            'etag': headers.get('ETag'),
+            'lastModified': headers.get('Last-Modified'),
+            'contentType': headers.get('Content-Type'),
+        }
+        with self.lock:
+            deduped = fn.is_file()
+            if deduped:
+                tmp.unlink()
+            else:
+                if not fn.parent.is_dir():
+                    fn.parent.mkdir(parents=True)
+                os.replace(tmp, fn)
+            with open(self.indexFile, 'a') as fp:
+                fp.write(json.dumps(meta, ensure_ascii=False, sort_keys=True))
+                fp.write('\n')
+            self.index[url] = meta
+        return deduped
+
+    def _load(self):
+        if not self.assetDir.is_dir():
+            self.assetDir.mkdir(parents=True)
+        if self.indexFile.is_file():
+            with open(self.indexFile, 'r') as fp:
+                for line in fp:
+                    try:
+                        meta = json.loads(line)
+                    except ValueError:
+                        break
+                    self.index[meta['url']] = meta
+
+
+class AssetDownloader:
+    def __init__(self, dir, workers=4, rate=None, headers=None, revalidate=False, timeout=60):
+        self.store = AssetStore(dir)
+        self.workers = max(1, workers or 1)
+        if rate is None and self.workers > 1:
+            rate = DEFAULT_RATE
+        self.limiter = HostRateLimiter(rate) if rate else None
+        self.headers = headers
+        self.revalidate = revalidate
+        self.timeout = timeout
+        self.stats = dict()
+        self.lock = threading.Lock()
+        self.req = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=self.workers)
+        self.req.mount('http://', adapter)
+        self.req.mount('https://', adapter)
+
+    def download_all(self, urls):
+        urls = list(dict.fromkeys(x for x in urls if x))
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return dict(zip(urls, pool.map(self.download, urls)))
+
+    def download(self, url):
+        try:
+            res = self._download(url)
+        except requests.RequestException as e:
+            print(f'{e.__class__.__name__} {url}', file=sys.stderr)
+            res = 'failed'
+        self.count(res)
+        return res
+
+    def _download(self, url):
+        store = self.store
+        meta = store.get(url)
+        if meta and not self.revalidate:
+            return 'skipped'
+
+        part = store.partial(url)
+        partMeta = part.with_suffix('.json')
+        headers = dict(self.headers or dict())
+        offset = 0
+        if part.is_file() and partMeta.is_file():
+            with open(partMeta, 'r') as fp:
+                validator = json.load(fp).get('validator')
+            if validator:
+                offset = part.stat().st_size
+                headers['Range'] = f'bytes={offset}-'
+                headers['If-Range'] = validator
+        elif meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('lastModified'):
+                headers['If-Modified-Since'] = meta['lastModified']
+
+        if self.limiter:
+            self.limiter.acquire(url)
+        print(url, file=sys.stderr)
+
+        with self.req.get(url, headers=headers, stream=True, timeout=self.timeout) as r:
+            if r.status_code == 304:
+                return 'fresh'
+            if r.status_code == 206 and offset:
+                mode = 'ab'
+            elif r.status_code == 200:
+                mode, offset = 'wb', 0
+            else:
+                print('%d %s' % (r.status_code, url), file=sys.stderr)
+                return 'failed'
+
+            if not part.parent.is_dir():
+                part.parent.mkdir(parents=True, exist_ok=True)
+            digest = hashlib.sha256()
+            if offset:
+                with open(part, 'rb') as fp:
+                    while (chunk := fp.read(CHUNK_SIZE)):
+                        digest.update(chunk)
+            validator = r.headers.get('ETag') or r.headers.get('Last-Modified')
+            with open(partMeta, 'w') as fp:
+                json.dump({'url': url, 'validator': validator}, fp)
+
+            size = offset
+            with open(part, mode) as fp:
+                for chunk in r.iter_content(CHUNK_SIZE):
+                    fp.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+
+            if (length := r.headers.get('Content-Length')) and size - offset != int(length):
+                return 'failed'
+            headers = r.headers
+
+        partMeta.unlink()
+        deduped = store.put(url, part, digest.hexdigest(), size, headers)
+        self.count('bytes', size - offset)
+        if deduped:
+            return 'deduped'
+        return 'resumed' if offset else 'downloaded'
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.stats[name] = self.stats.get(name, 0) + value
+
+    def report(self):
+        return ', '.join(f'{k}: {v}' for k, v in sorted(self.stats.items()))
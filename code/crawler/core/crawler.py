@@ -4,25 +4,58 @@ author: paiv, https://github.com/paiv/
 """
 
 import json
+import os
+import random
 import requests
 import sys
 import time
 import tomllib
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
 from lxml import html
+from requests.adapters import HTTPAdapter
 from pathlib import Path
-from urllib.parse import urlsplit, urlunsplit
+from datetime import datetime, UTC
+from .archive import ResponseArchive
+from .assets import CHUNK_SIZE
+from .frontier import Frontier, normalize_url
+from .httpcache import HttpCache, make_response
+from .metrics import BYTES, Metrics, Progress
+from .pipeline import Pipeline
+from .ratelimit import AdaptiveRateLimiter, HostRateLimiter, DEFAULT_RATE
 
 
 def jsondump(obj, fn):
     if not fn.parent.is_dir():
-        fn.parent.mkdir(parents=True)
-    with open(fn, 'w') as fp:
+        fn.parent.mkdir(parents=True, exist_ok=True)
+    tmp = fn.with_name(f'{fn.name}.{os.getpid()}.tmp')
+    with open(tmp, 'w') as fp:
         json.dump(obj, fp, ensure_ascii=False, sort_keys=True, indent=2, separators=[',', ': '])
+    os.replace(tmp, fn)
     return fn
 
 
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+NETWORK_ERROR = 599
+
+
+def retry_after(r):
+    if (value := r.headers.get('Retry-After')) is None:
+        return None
+    if value.strip().isdigit():
+        return int(value)
+    try:
+        return max(0, (parsedate_to_datetime(value) - datetime.now(UTC)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
 class Crawler:
-    def __init__(self, name, dir, url, parser, dumper, delay=0.01, headers=None):
+    def __init__(self, name, dir, url, parser, dumper, delay=0.01, headers=None,
+            workers=1, rate=None, state=None, cache=False, archive=False, replay=False, processes=None,
+            metrics=None, progress=False, retries=3, backoff=1, maxBackoff=60, adaptive=False, maxRate=None,
+            stream=False, timeout=60):
         self.name = name or dir.name
         self.dumpDir = dir
         self.rootUrl = url
@@ -32,11 +65,37 @@ class Crawler:
         self.headers = self._load_env()
         if headers:
             self.headers = (self.headers or dict()) | headers
-        self.fringe = [self.rootUrl]
+        self.requeued = dict()
+        self.retries = retries
+        self.backoff = backoff
+        self.maxBackoff = maxBackoff
+        self.workers = max(1, workers or 1)
+        self.processes = processes
+        self.stream = stream
+        if adaptive:
+            self.limiter = AdaptiveRateLimiter(rate or DEFAULT_RATE, maxRate=maxRate)
+        else:
+            if rate is None and self.workers > 1 and delay:
+                rate = DEFAULT_RATE
+            self.limiter = HostRateLimiter(rate) if rate else None
+        self.timeout = timeout
+        self.cache = HttpCache(self.dumpDir / 'http-cache') if cache else None
+        self.replay = replay
+        self.archive = ResponseArchive(self.dumpDir / 'archive') if (archive or replay) else None
+        self.metrics = metrics or Metrics(name=self.name)
+        self.progress = Progress() if progress else None
+        self.expected = 0
+        self.pending = list()
         self.visited = set()
-        self.state = CrawlerState(fileName= '-'.join([self.name, 'crawler-state.json']))
+        self.fringe = self.frontier([self.rootUrl])
+        state = state or CrawlerState
+        self.state = state(fileName= '-'.join([self.name, state.fileName]))
         self.state.restore(self)
         self.req = requests.Session()
+        if self.workers > 1:
+            adapter = HTTPAdapter(pool_maxsize=self.workers)
+            self.req.mount('http://', adapter)
+            self.req.mount('https://', adapter)
 
     def _load_env(self):
         headers = None
@@ -47,68 +106,264 @@ class Crawler:
         return headers
 
     def crawl(self):
-        while self.fringe:
-            url = self.norm(self.fringe.pop(0))
+        try:
+            if self.processes:
+                Pipeline(self, processes=self.processes).run()
+            elif self.workers > 1:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    self._crawl(pool.map)
+            else:
+                self._crawl(map)
+        finally:
+            self.state.close()
+        self.report()
 
-            if url in self.visited:
+    def _crawl(self, fetch):
+        while self.fringe:
+            while self.fringe and len(self.pending) < self.workers:
+                url = self.fringe.pop()
+                if url is None:
+                    break
+                if url not in self.visited and url not in self.pending:
+                    self.pending.append(url)
+
+            if not self.pending:
+                self.fringe.wait()
                 continue
 
-            r = self.get(url)
-            if r.status_code == 200:
-                page = self.parser.getcontent(r)
+            batch = list(self.pending)
+            for url, r in zip(batch, fetch(self.page, batch)):
+                self.pending.remove(url)
+                self._visit(url, r, fetch)
 
-                self.fringe.extend(self.parser.links(page))
+    def _visit(self, url, r, fetch):
+        metrics = self.metrics
+        if r.status_code == 200:
+            links, items = self.extract(r)
+            items = [x for x in items if not self.dumper.exists(x)]
+            self.enqueue(links)
+
+            incomplete = False
+            partial = [x['url'] for x in items if x.get('_partial')]
+            self.expected = len(partial)
+            pages = fetch(self.get, partial)
 
-                for item in self.parser.items(page):
+            for item in items:
 
+                if item.get('_partial'):
+                    r = next(pages)
+                    self.expected -= 1
                     if self.dumper.exists(item):
                         continue
-
-                    if item.get('_partial'):
-                        r = self.get(item['url'])
+                    if r.status_code != 200:
+                        print('%d %s' % (r.status_code, item['url']), file=sys.stderr)
+                        incomplete = incomplete or self.retryable(r.status_code)
+                        continue
+                    with metrics.timer('parse_seconds'):
                         item_page = self.parser.getcontent(r)
+                    with metrics.timer('extract_seconds'):
                         item = self.parser.parse(item, item_page)
 
+                elif self.dumper.exists(item):
+                    continue
+
+                with metrics.timer('dump_seconds'):
                     self.dumper.dump(item, self)
+                metrics.count('items')
+                self.tick()
 
-            else:
-                print('%d %s' % (r.status_code, url), file=sys.stderr)
+        else:
+            print('%d %s' % (r.status_code, url), file=sys.stderr)
+            incomplete = self.retryable(r.status_code)
 
-            self.visited.add(url)
+        with metrics.timer('state_seconds'):
+            self.dumper.flush()
+            if not (incomplete and self.requeue(url)):
+                self.visited.add(url)
+                self.state.visit(self, url)
             self.state.save(self)
+        self.tick()
+
+    def extract(self, r):
+        metrics = self.metrics
+        if self.stream and self.parser.streaming:
+            links = list()
+            items = list()
+            with metrics.timer('extract_seconds'):
+                for kind, value in self.parser.stream(self.chunks(r), r.url):
+                    (links if kind == 'link' else items).append(value)
+            return links, items
+
+        with metrics.timer('parse_seconds'):
+            page = self.parser.getcontent(r)
+        with metrics.timer('extract_seconds'):
+            return list(self.parser.links(page)), list(self.parser.items(page))
+
+    def tick(self):
+        queued = len(self.fringe) + len(self.pending)
+        self.metrics.gauge('queue_depth', queued)
+        if isinstance(self.limiter, AdaptiveRateLimiter):
+            self.metrics.gauge('request_rate', max(self.limiter.rates().values(), default=0))
+        self.metrics.tick()
+        if self.progress:
+            done = self.metrics.counters.get('requests', 0)
+            self.progress.update(done, done + queued + self.expected)
+
+    def frontier(self, urls=()):
+        fringe = Frontier(seen=self.visited)
+        for url in map(self.norm, urls):
+            fringe.push(url, self.priority(url))
+        return fringe
+
+    def enqueue(self, urls):
+        urls = [url for url in map(self.norm, urls) if self.fringe.push(url, self.priority(url))]
+        self.state.enqueue(self, urls)
+
+    def priority(self, url):
+        priority = self.parser.priority(url)
+        if self.cache and url in self.cache:
+            priority += 1
+        return priority
+
+    def retryable(self, status):
+        return status in RETRY_STATUSES or status == NETWORK_ERROR
+
+    def requeue(self, url):
+        if self.state.requeues(self, url) >= self.retries:
+            print(f'giving up on {url}', file=sys.stderr)
+            return False
+        self.requeued[url] = self.requeued.get(url, 0) + 1
+        self.metrics.count('requeued')
+        self.fringe.push(url, self.priority(url) + 2, force=True)
+        self.state.enqueue(self, [url])
+        return True
+
+    def report(self):
+        if self.progress:
+            done = self.metrics.counters.get('requests', 0)
+            self.progress.finish(done, done)
+        self.metrics.save()
+        if self.cache:
+            print(self.cache.report(), file=sys.stderr)
+
+    def log(self, url):
+        if not self.progress:
+            print(url, file=sys.stderr)
 
     def reset(self):
         self.state.reset(self)
         self.dumper.reset()
 
     def norm(self, url):
-        return urlunsplit(urlsplit(url))
+        return normalize_url(url)
 
-    def get(self, url):
-        time.sleep(self.delay)
-        print(url, file=sys.stderr)
-        return self.req.get(url, headers=self.headers)
+    def throttle(self, url):
+        if self.limiter:
+            self.limiter.acquire(url)
+        else:
+            time.sleep(self.delay)
+
+    def page(self, url):
+        return self.get(url, stream=self.stream and self.parser.streaming)
+
+    def get(self, url, stream=False):
+        metrics = self.metrics
+        if self.replay:
+            self.log(url)
+            r = self.archive.get(url) or make_response(url, 404, dict(), b'')
+        else:
+            attempt = 0
+            while True:
+                with metrics.timer('throttle_seconds'):
+                    self.throttle(url)
+                self.log(url)
+                with metrics.timer('fetch_seconds'):
+                    try:
+                        r = self.fetch(url, stream=stream)
+                    except (requests.ConnectionError, requests.Timeout) as e:
+                        print(f'{e.__class__.__name__} {url}', file=sys.stderr)
+                        r = make_response(url, NETWORK_ERROR, dict(), b'')
+                if not self.retryable(r.status_code):
+                    if self.limiter:
+                        self.limiter.success(url)
+                    break
+                pause = retry_after(r)
+                if self.limiter:
+                    self.limiter.backoff(url, pause)
+                if attempt >= self.retries:
+                    break
+                r.close()
+                wait = max(pause or 0, self.delay_for(attempt))
+                print('%d %s, retry in %.1fs' % (r.status_code, url, wait), file=sys.stderr)
+                metrics.count('retries')
+                metrics.observe('backoff_seconds', wait)
+                time.sleep(wait)
+                attempt += 1
+            if self.archive and r.status_code != NETWORK_ERROR:
+                self.archive.put(url, r)
+        metrics.count('requests')
+        metrics.count(f'responses_{r.status_code}')
+        if not stream or r.status_code != 200:
+            self.measure(len(r.content))
+        return r
+
+    def chunks(self, r):
+        size = 0
+        for chunk in r.iter_content(CHUNK_SIZE):
+            size += len(chunk)
+            yield chunk
+        self.measure(size)
+
+    def measure(self, size):
+        self.metrics.count('response_bytes', size)
+        self.metrics.observe('response_size_bytes', size, BYTES)
+
+    def fetch(self, url, stream=False):
+        if self.cache:
+            r = self.req.get(url, headers=self.cache.headers(url, self.headers), timeout=self.timeout)
+            return self.cache.update(url, r)
+        return self.req.get(url, headers=self.headers, stream=stream, timeout=self.timeout)
+
+    def delay_for(self, attempt):
+        wait = min(self.maxBackoff, self.backoff * 2 ** attempt)
+        return random.uniform(wait / 2, wait)
 
     def download(self, url, fn):
         if url is None:
             return
-        r = self.get(url)
+        fn = Path(fn)
+        r = self.get(url, stream=True)
         if r.status_code == 200:
-            with open(fn, 'wb') as fp:
-                fp.write(r.content)
+            tmp = fn.with_name(fn.name + '.tmp')
+            with open(tmp, 'wb') as fp:
+                for chunk in self.chunks(r):
+                    fp.write(chunk)
+            os.replace(tmp, fn)
         else:
             print('%d %s' % (r.status_code, url), file=sys.stderr)
 
 
 class CrawlerState:
-    def __init__(self, fileName='crawler-state.json'):
-        self.fileName = fileName
+    fileName = 'crawler-state.json'
+
+    def __init__(self, fileName=None):
+        if fileName:
+            self.fileName = fileName
+
+    def enqueue(self, crawler, urls):
+        pass
+
+    def visit(self, crawler, url):
+        pass
+
+    def requeues(self, crawler, url):
+        return crawler.requeued.get(url, 0)
 
     def save(self, crawler):
         fn = crawler.dumpDir / self.fileName
         state = {
             'rootUrl': crawler.rootUrl,
-            'fringe': crawler.fringe,
+            'fringe': crawler.pending + list(crawler.fringe),
             'visited': list(crawler.visited)
         }
         jsondump(state, fn)
@@ -119,17 +374,20 @@ class CrawlerState:
             with open(fn, 'r') as fp:
                 state = json.load(fp)
             crawler.rootUrl = state['rootUrl']
-            crawler.fringe = state['fringe']
             crawler.visited = set(state['visited'])
+            crawler.fringe = crawler.frontier(state['fringe'])
 
     def reset(self, crawler):
-        crawler.fringe = [crawler.rootUrl]
         crawler.visited = set()
+        crawler.fringe = crawler.frontier([crawler.rootUrl])
 
         fn = crawler.dumpDir / self.fileName
         if fn.is_file():
             fn.unlink()
 
+    def close(self):
+        pass
+
 
 class Dumper:
     def __init__(self, dir):
@@ -141,8 +399,13 @@ class Dumper:
     def dump(self, item):
         pass
 
+    def flush(self):
+        pass
+
 
 class Parser:
+    streaming = False
+
     def getcontent(self, request):
         return html.fromstring(request.content)
 
@@ -154,3 +417,13 @@ class Parser:
 
     def parse(self, item, page):
         return item
+
+    def priority(self, url):
+        return 0
+
+    def stream(self, chunks, url):
+        page = self.getcontent(make_response(url, 200, dict(), b''.join(chunks)))
+        for link in self.links(page):
+            yield ('link', link)
+        for item in self.items(page):
+            yield ('item', item)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+author: paiv, https://github.com/paiv/
+"""
+
+import heapq
+import itertools
+from collections import deque
+from urllib.parse import urlsplit, urlunsplit
+
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url):
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+    if parts.username:
+        auth = parts.username + (f':{parts.password}' if parts.password else '')
+        host = f'{auth}@{host}'
+    return urlunsplit((scheme, host, parts.path or '/', parts.query, ''))
+
+
+class Frontier:
+    def __init__(self, urls=(), seen=()):
+        self.queues = dict()
+        self.hosts = deque()
+        self.seen = set(seen)
+        self.size = 0
+        self.counter = itertools.count()
+        for url in urls:
+            self.push(url)
+
+    def push(self, url, priority=0, force=False):
+        if url in self.seen and not force:
+            return False
+        self.seen.add(url)
+        host = urlsplit(url).netloc
+        if (queue := self.queues.get(host)) is None:
+            queue = list()
+            self.queues[host] = queue
+        if not queue:
+            self.hosts.append(host)
+        heapq.heappush(queue, (priority, next(self.counter), url))
+        self.size += 1
+        return True
+
+    def pop(self):
+        host = self.hosts.popleft()
+        queue = self.queues[host]
+        _, _, url = heapq.heappop(queue)
+        if queue:
+            self.hosts.append(host)
+        else:
+            del self.queues[host]
+        self.size -= 1
+        return url
+
+    def wait(self):
+        pass
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for queue in self.queues.values():
+            for _, _, url in sorted(queue):
+                yield url
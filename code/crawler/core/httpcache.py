@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+author: paiv, https://github.com/paiv/
+"""
+
+import hashlib
+import json
+import os
+import requests
+import threading
+from pathlib import Path
+from requests.structures import CaseInsensitiveDict
+
+
+def make_response(url, status, headers, content):
+    r = requests.Response()
+    r.status_code = status
+    r.url = url
+    r.headers = CaseInsensitiveDict(headers)
+    r.encoding = requests.utils.get_encoding_from_headers(r.headers)
+    r._content = content
+    r._content_consumed = True
+    return r
+
+
+class HttpCache:
+    skipHeaders = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+    def __init__(self, dir):
+        self.cacheDir = Path(dir)
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.lock = threading.Lock()
+
+    def headers(self, url, headers=None):
+        meta = self._meta(url)
+        if not meta:
+            self._count('misses')
+            return headers
+
+        self._count('revalidations')
+        headers = dict(headers or dict())
+        if (etag := meta.get('etag')):
+            headers['If-None-Match'] = etag
+        if (modified := meta.get('modified')):
+            headers['If-Modified-Since'] = modified
+        return headers
+
+    def update(self, url, r):
+        if r.status_code == 304:
+            meta = self._meta(url)
+            fn = self._path(url, '.body')
+            if meta and fn.is_file():
+                self._count('hits')
+                return make_response(meta['url'], 200, meta['headers'], fn.read_bytes())
+        elif r.status_code == 200:
+            etag = r.headers.get('ETag')
+            modified = r.headers.get('Last-Modified')
+            if etag or modified:
+                self.store(url, r, etag, modified)
+        return r
+
+    def store(self, url, r, etag, modified):
+        meta = {
+            'url': r.url,
+            'etag': etag,
+            'modified': modified,
+            'headers': {k: v for k, v in r.headers.items() if k.lower() not in self.skipHeaders},
+        }
+        fn = self._path(url, '.body')
+        if not fn.parent.is_dir():
+            fn.parent.mkdir(parents=True, exist_ok=True)
+        self._write(fn, r.content)
+        self._write(self._path(url, '.json'), json.dumps(meta, ensure_ascii=False).encode())
+
+    def __contains__(self, url):
+        return self._path(url, '.json').is_file()
+
+    def report(self):
+        return 'http cache: %d hits, %d misses, %d revalidations' % (self.hits, self.misses, self.revalidations)
+
+    def _count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _meta(self, url):
+        fn = self._path(url, '.json')
+        if fn.is_file():
+            with open(fn, 'r') as fp:
+                return json.load(fp)
+
+    def _path(self, url, suffix):
+        key = hashlib.sha1(url.encode()).hexdigest()
+        return self.cacheDir / key[:2] / (key + suffix)
+
+    def _write(self, fn, data):
+        tmp = fn.with_name(fn.name + '.%d.tmp' % threading.get_ident())
+        with open(tmp, 'wb') as fp:
+            fp.write(data)
+        os.replace(tmp, fn)
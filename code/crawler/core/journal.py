@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+author: paiv, https://github.com/paiv/
+"""
+
+import json
+import os
+from .crawler import CrawlerState
+
+
+class JournalState(CrawlerState):
+    fileName = 'crawler-state.jsonl'
+
+    def __init__(self, fileName=None, compactEvery=10000):
+        super().__init__(fileName=fileName)
+        self.compactEvery = compactEvery
+        self.events = 0
+        self.fp = None
+
+    def enqueue(self, crawler, urls):
+        for url in urls:
+            self._append(crawler, 'push', url)
+
+    def visit(self, crawler, url):
+        self._append(crawler, 'visit', url)
+
+    def save(self, crawler):
+        if self.events >= max(self.compactEvery, len(crawler.fringe) + len(crawler.visited)):
+            self.compact(crawler)
+        elif self.fp:
+            self.fp.flush()
+
+    def restore(self, crawler):
+        fn = crawler.dumpDir / self.fileName
+        if not fn.is_file():
+            CrawlerState(fileName=fn.with_suffix('.json').name).restore(crawler)
+            self.compact(crawler)
+            return
+
+        rootUrl = crawler.rootUrl
+        pushed = list()
+        visited = set()
+        with open(fn, 'r') as fp:
+            for line in fp:
+                try:
+                    op, url = json.loads(line)
+                except ValueError:
+                    break
+                if op == 'root':
+                    rootUrl = url
+                elif op == 'push':
+                    pushed.append(url)
+                elif op == 'visit':
+                    visited.add(url)
+
+        crawler.rootUrl = rootUrl
+        crawler.visited = visited
+        crawler.fringe = crawler.frontier(pushed)
+        self.events = len(pushed) + len(visited)
+
+    def reset(self, crawler):
+        self.close()
+        super().reset(crawler)
+        self.compact(crawler)
+
+    def compact(self, crawler):
+        self.close()
+        fn = crawler.dumpDir / self.fileName
+        if not fn.parent.is_dir():
+            fn.parent.mkdir(parents=True)
+        tmp = fn.with_name(fn.name + '.tmp')
+        with open(tmp, 'w') as fp:
+            self._write(fp, 'root', crawler.rootUrl)
+            for url in crawler.pending:
+                self._write(fp, 'push', url)
+            for url in crawler.fringe:
+                self._write(fp, 'push', url)
+            for url in sorted(crawler.visited):
+                self._write(fp, 'visit', url)
+        os.replace(tmp, fn)
+        self.events = 0
+
+    def close(self):
+        if self.fp:
+            self.fp.close()
+            self.fp = None
+
+    def _append(self, crawler, op, url):
+        if not self.fp:
+            self.fp = open(crawler.dumpDir / self.fileName, 'a')
+        self._write(self.fp, op, url)
+        self.events += 1
+
+    def _write(self, fp, op, url):
+        fp.write(json.dumps([op, url], ensure_ascii=False))
+        fp.write('\n')
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""
+author: paiv, https://github.com/paiv/
+"""
+
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BYTES = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram:
+    def __init__(self, buckets=SECONDS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'max': self.max,
+        }
+
+
+class Metrics:
+    prefix = 'fci_crawler'
+
+    def __init__(self, name='crawler', jsonFile=None, promFile=None, interval=10):
+        self.name = name
+        self.jsonFile = Path(jsonFile) if jsonFile else None
+        self.promFile = Path(promFile) if promFile else None
+        self.interval = interval
+        self.histograms = dict()
+        self.counters = dict()
+        self.gauges = dict()
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.saved = time.monotonic()
+
+    def observe(self, name, value, buckets=SECONDS):
+        with self.lock:
+            if (h := self.histograms.get(name)) is None:
+                h = Histogram(buckets)
+                self.histograms[name] = h
+            h.observe(value)
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def sibling(self, name):
+        def rename(fn):
+            return fn.with_name(f'{fn.stem}-{name}{fn.suffix}') if fn else None
+        return Metrics(name=name, jsonFile=rename(self.jsonFile), promFile=rename(self.promFile), interval=self.interval)
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    def summary(self):
+        with self.lock:
+            return {
+                'name': self.name,
+                'started': self.started,
+                'elapsed': time.time() - self.started,
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'histograms': {k: h.summary() for k, h in self.histograms.items()},
+            }
+
+    def prometheus(self):
+        lines = list()
+        label = f'crawler="{self.name}"'
+
+        def metric(name, kind, samples):
+            lines.append(f'# TYPE {self.prefix}_{name} {kind}')
+            lines.extend(f'{self.prefix}_{name}{{{label}{extra}}} {value}' for extra, value in samples)
+
+        with self.lock:
+            for k, v in sorted(self.counters.items()):
+                metric(f'{k}_total', 'counter', [('', v)])
+            for k, v in sorted(self.gauges.items()):
+                metric(k, 'gauge', [('', v)])
+            for k, h in sorted(self.histograms.items()):
+                samples = list()
+                seen = 0
+                for le, n in zip(h.buckets, h.counts):
+                    seen += n
+                    samples.append((f',le="{le}"', seen))
+                samples.append((',le="+Inf"', h.count))
+                lines.append(f'# TYPE {self.prefix}_{k} histogram')
+                lines.extend(f'{self.prefix}_{k}_bucket{{{label}{extra}}} {value}' for extra, value in samples)
+                lines.append(f'{self.prefix}_{k}_sum{{{label}}} {h.sum}')
+                lines.append(f'{self.prefix}_{k}_count{{{label}}} {h.count}')
+        return '\n'.join(lines) + '\n'
+
+    def tick(self):
+        if time.monotonic() - self.saved >= self.interval:
+            self.save()
+
+    def save(self):
+        self.saved = time.monotonic()
+        if self.jsonFile:
+            self._write(self.jsonFile, json.dumps(self.summary(), indent=2, sort_keys=True))
+        if self.promFile:
+            self._write(self.promFile, self.prometheus())
+
+    def _write(self, fn, text):
+        if not fn.parent.is_dir():
+            fn.parent.mkdir(parents=True)
+        tmp = fn.with_name(fn.name + '.tmp')
+        with open(tmp, 'w') as fp:
+            fp.write(text)
+        os.replace(tmp, fn)
+
+
+class Progress:
+    def __init__(self, file=None, interval=0.5):
+        self.file = file or sys.stderr
+        self.interval = interval
+        self.started = time.monotonic()
+        self.shown = 0
+        self.width = 0
+
+    def update(self, done, total, force=False):
+        now = time.monotonic()
+        if not force and now - self.shown < self.interval:
+            return
+        self.shown = now
+        elapsed = now - self.started
+        rate = done / elapsed if elapsed else 0
+        left = max(0, total - done)
+        eta = '%d:%02d' % divmod(int(left / rate), 60) if rate else '-:--'
+        line = f'{done}/{total} pages  {rate:.1f}/s  ETA {eta}'
+        print('\r' + line.ljust(self.width), end='', file=self.file, flush=True)
+        self.width = len(line)
+
+    def finish(self, done, total):
+        self.update(done, total, force=True)
+        print(file=self.file)
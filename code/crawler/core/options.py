@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+"""
+author: paiv, https://github.com/paiv/
+"""
+
+
+def add_crawler_arguments(parser):
+    parser.add_argument('--reset', action='store_true', help='Reset data')
+    parser.add_argument('-o', '--data-dir', default='data', help='Data directory')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of concurrent requests')
+    parser.add_argument('--rate', type=float, help='Requests per second, per host, default is 1/s with -j > 1')
+    parser.add_argument('--adaptive', action='store_true',
+        help='Adapt the request rate, start at --rate or 1/s, raise it while responses are healthy, halve it on 429 and 5xx')
+    parser.add_argument('--max-rate', type=float, help='Upper bound of the adaptive request rate, default is 5/s')
+    parser.add_argument('--retries', type=int, default=3, help='Retries of 429, 5xx and network errors')
+    parser.add_argument('-p', '--processes', type=int, help='Parse pages in a pool of processes')
+    parser.add_argument('--stream', action='store_true',
+        help='Extract listing pages with a pull parser as the body arrives; --cache, --archive and -p read the body in full first')
+    parser.add_argument('--journal', action='store_true', help='Keep crawler state in an append-only journal')
+    parser.add_argument('--shared', action='store_true',
+        help='Claim pages from a work queue in the data directory shared with other crawler processes')
+    parser.add_argument('--cache', action='store_true', help='Revalidate pages against a local HTTP cache')
+    parser.add_argument('--archive', action='store_true', help='Store raw responses in the archive')
+    parser.add_argument('--replay', action='store_true', help='Serve responses from the archive, no network access')
+    parser.add_argument('--store', action='store_true', help='Dump entries into a single SQLite store')
+    parser.add_argument('--metrics', metavar='FILE', help='Write a JSON summary of timings, sizes and counts')
+    parser.add_argument('--prom', metavar='FILE', help='Write metrics in the Prometheus textfile format')
+    parser.add_argument('--progress', action='store_true', help='Show a progress line with ETA instead of URLs')
+    return parser
+
+
+def crawler_options(args, name):
+    from .journal import JournalState
+    from .metrics import Metrics
+    from .workqueue import SharedState
+
+    return dict(workers=args.jobs, rate=args.rate,
+        state=SharedState if args.shared else JournalState if args.journal else None,
+        cache=args.cache, archive=args.archive, replay=args.replay, processes=args.processes,
+        retries=args.retries, adaptive=args.adaptive, maxRate=args.max_rate, stream=args.stream,
+        store=args.store, progress=args.progress,
+        metrics=Metrics(name=name, jsonFile=args.metrics, promFile=args.prom))
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+"""
+author: paiv, https://github.com/paiv/
+"""
+
+import os
+import sys
+import time
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from .stream import chunked
+
+
+Content = namedtuple('Content', 'url status_code content headers')
+
+_parser = None
+_stream = False
+
+
+def _init(parser, stream=False):
+    global _parser, _stream
+    _parser = parser
+    _stream = stream and parser.streaming
+
+
+def _parse_page(content):
+    start = time.perf_counter()
+    if _stream:
+        links = list()
+        items = list()
+        for kind, value in _parser.stream(chunked(content.content), content.url):
+            (links if kind == 'link' else items).append(value)
+        return links, items, dict(extract_seconds=time.perf_counter() - start)
+    page = _parser.getcontent(content)
+    parsed = time.perf_counter()
+    links, items = list(_parser.links(page)), list(_parser.items(page))
+    return links, items, dict(parse_seconds=parsed - start, extract_seconds=time.perf_counter() - parsed)
+
+
+def _parse_item(item, content):
+    start = time.perf_counter()
+    page = _parser.getcontent(content)
+    parsed = time.perf_counter()
+    item = _parser.parse(item, page)
+    return item, dict(parse_seconds=parsed - start, extract_seconds=time.perf_counter() - parsed)
+
+
+class Pipeline:
+    def __init__(self, crawler, processes=None, maxsize=None):
+        self.crawler = crawler
+        self.processes = processes
+        self.maxsize = maxsize or 4 * crawler.workers
+
+    def fetch(self, url):
+        r = self.crawler.get(url)
+        return Content(r.url, r.status_code, r.content, dict(r.headers))
+
+    def run(self):
+        crawler = self.crawler
+        waiting = deque()
+        ready = deque()
+        fetching = dict()
+        parsing = dict()
+        remaining = dict()
+        incomplete = set()
+
+        def finish(url):
+            remaining[url] -= 1
+            if remaining[url] == 0:
+                del remaining[url]
+                crawler.pending.remove(url)
+                with crawler.metrics.timer('state_seconds'):
+                    crawler.dumper.flush()
+                    if not (url in incomplete and crawler.requeue(url)):
+                        crawler.visited.add(url)
+                        crawler.state.visit(crawler, url)
+                    incomplete.discard(url)
+                    crawler.state.save(crawler)
+            crawler.expected = len(waiting) + len(fetching) + len(ready) + len(parsing)
+            crawler.tick()
+
+        def observe(timings):
+            for name, seconds in timings.items():
+                crawler.metrics.observe(name, seconds)
+
+        nparsers = self.processes or os.cpu_count() or 1
+
+        with ThreadPoolExecutor(max_workers=crawler.workers) as fetchers, \
+            ProcessPoolExecutor(max_workers=nparsers, initializer=_init, initargs=(crawler.parser, crawler.stream)) as parsers:
+
+            while crawler.fringe or waiting or ready or fetching or parsing:
+
+                while ready and len(parsing) < nparsers:
+                    owner, item, content = ready.popleft()
+                    if item is None:
+                        f = parsers.submit(_parse_page, content)
+                    else:
+                        f = parsers.submit(_parse_item, item, content)
+                    parsing[f] = (owner, item)
+
+                while len(fetching) < crawler.workers and len(fetching) + len(ready) < self.maxsize:
+                    if waiting:
+                        owner, item = waiting.popleft()
+                        fetching[fetchers.submit(self.fetch, item['url'])] = (owner, item)
+                    elif crawler.fringe:
+                        url = crawler.fringe.pop()
+                        if url is None:
+                            break
+                        if url in crawler.visited or url in remaining:
+                            continue
+                        remaining[url] = 1
+                        crawler.pending.append(url)
+                        fetching[fetchers.submit(self.fetch, url)] = (url, None)
+                    else:
+                        break
+
+                if not (fetching or parsing):
+                    crawler.fringe.wait()
+                    continue
+
+                done, _ = wait(list(fetching) + list(parsing), return_when=FIRST_COMPLETED)
+
+                for f in done:
+                    if f in fetching:
+                        owner, item = fetching.pop(f)
+                        content = f.result()
+                        if content.status_code != 200:
+                            print('%d %s' % (content.status_code, content.url), file=sys.stderr)
+                            if crawler.retryable(content.status_code):
+                                incomplete.add(owner)
+                            finish(owner)
+                        else:
+                            ready.append((owner, item, content))
+                        continue
+
+                    owner, item = parsing.pop(f)
+                    if item is None:
+                        links, items, timings = f.result()
+                        observe(timings)
+                        crawler.enqueue(links)
+                        for item in items:
+                            if crawler.dumper.exists(item):
+                                continue
+                            if item.get('_partial'):
+                                remaining[owner] += 1
+                                waiting.append((owner, item))
+                            else:
+                                with crawler.metrics.timer('dump_seconds'):
+                                    crawler.dumper.dump(item, crawler)
+                                crawler.metrics.count('items')
+                    else:
+                        item, timings = f.result()
+                        observe(timings)
+                        if not crawler.dumper.exists(item):
+                            with crawler.metrics.timer('dump_seconds'):
+                                crawler.dumper.dump(item, crawler)
+                            crawler.metrics.count('items')
+                    finish(owner)
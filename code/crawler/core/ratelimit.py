@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+author: paiv, https://github.com/paiv/
+"""
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+ADAPTIVE_MAX_RATE = 5
+
+DEFAULT_RATE = 1
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+        self.until = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.until:
+                    wait = self.until - now
+                else:
+                    self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+                    self.stamp = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self.lock:
+            now = time.monotonic()
+            self.until = max(self.until, now + seconds)
+            self.tokens = 0
+            self.stamp = max(self.stamp, self.until)
+
+
+class HostRateLimiter:
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = dict()
+        self.lock = threading.Lock()
+
+    def bucket(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self.lock:
+            if (bucket := self.buckets.get(host)) is None:
+                bucket = TokenBucket(self.rate, burst=self.burst)
+                self.buckets[host] = bucket
+        return bucket
+
+    def acquire(self, url):
+        self.bucket(url).acquire()
+
+    def success(self, url):
+        pass
+
+    def backoff(self, url, pause=None):
+        if pause:
+            self.bucket(url).pause(pause)
+
+
+class AdaptiveRateLimiter(HostRateLimiter):
+    def __init__(self, rate, burst=1, minRate=0.1, maxRate=None, increase=0.5, decrease=0.5):
+        super().__init__(rate, burst=burst)
+        self.minRate = minRate
+        self.maxRate = max(rate, maxRate or ADAPTIVE_MAX_RATE)
+        self.increase = increase
+        self.decrease = decrease
+
+    def success(self, url):
+        bucket = self.bucket(url)
+        with bucket.lock:
+            bucket.rate = min(bucket.rate + self.increase, self.maxRate)
+
+    def backoff(self, url, pause=None):
+        bucket = self.bucket(url)
+        with bucket.lock:
+            bucket.rate = max(self.minRate, bucket.rate * self.decrease)
+        super().backoff(url, pause)
+
+    def rates(self):
+        with self.lock:
+            return {host: bucket.rate for host, bucket in self.buckets.items()}
@@ -0,0 +1,15 @@
+#!/usr/bin/env python
+"""
+author: paiv, https://github.com/paiv/
+"""
+
+from functools import lru_cache
+from lxml import etree
+
+
+EXSLT = {'re': 'http://exslt.org/regular-expressions'}
+
+
+@lru_cache(maxsize=None)
+def xpath(expr):
+    return etree.XPath(expr, namespaces=EXSLT)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+author: paiv, https://github.com/paiv/
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+
+
+class DumpStore:
+    def __init__(self, fileName, batchSize=500):
+        self.fileName = Path(fileName)
+        self.batchSize = batchSize
+        self.batch = dict()
+        if not self.fileName.parent.is_dir():
+            self.fileName.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.fileName, timeout=30)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, data TEXT NOT NULL)')
+        self.db.commit()
+        self.keys = {key for key, in self.db.execute('SELECT key FROM entries')}
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def get(self, key):
+        if (data := self.batch.get(key)) is not None:
+            return json.loads(data)
+        for data, in self.db.execute('SELECT data FROM entries WHERE key = ?', (key,)):
+            return json.loads(data)
+
+    def put(self, key, obj):
+        self.batch[key] = json.dumps(obj, ensure_ascii=False, sort_keys=True)
+        self.keys.add(key)
+        if len(self.batch) >= self.batchSize:
+            self.commit()
+
+    def commit(self):
+        if self.batch:
+            with self.db:
+                self.db.executemany('INSERT OR REPLACE INTO entries (key, data) VALUES (?, ?)', self.batch.items())
+        self.batch = dict()
+
+    def items(self):
+        self.commit()
+        for key, data in self.db.execute('SELECT key, data FROM entries ORDER BY CAST(key AS INTEGER), key'):
+            yield key, json.loads(data)
+
+    def clear(self):
+        self.batch = dict()
+        with self.db:
+            self.db.execute('DELETE FROM entries')
+        self.keys = set()
+
+    def close(self):
+        self.commit()
+        self.db.close()
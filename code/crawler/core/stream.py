@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+"""
+author: paiv, https://github.com/paiv/
+"""
+
+from lxml import etree
+
+
+def chunked(data, size=1 << 16):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def stream_roots(chunks, match):
+    parser = etree.HTMLPullParser(events=('start', 'end'))
+    stack = list()
+
+    def drain():
+        for event, el in parser.read_events():
+            if event == 'start':
+                if match(el):
+                    stack.append(el)
+            elif stack:
+                if stack[-1] is el:
+                    stack.pop()
+                    if not stack:
+                        yield el
+                        if (parent := el.getparent()) is not None:
+                            parent.remove(el)
+            else:
+                el.clear()
+                while (prev := el.getprevious()) is not None:
+                    el.getparent().remove(prev)
+
+    empty = True
+    for chunk in chunks:
+        if chunk:
+            empty = False
+            parser.feed(chunk)
+            yield from drain()
+    if empty:
+        return
+    parser.close()
+    yield from drain()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+"""
+author: paiv, https://github.com/paiv/
+"""
+
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from .crawler import CrawlerState
+
+
+QUEUED = 0
+LEASED = 1
+DONE = 2
+ABANDONED = 3
+
+
+class WorkQueue:
+    def __init__(self, fileName, owner=None, lease=120, heartbeat=None, maxAge=None, maxAttempts=None):
+        self.fileName = Path(fileName)
+        self.owner = owner or f'{socket.gethostname()}-{os.getpid()}'
+        self.lease = lease
+        self.heartbeat = heartbeat or lease / 4
+        self.maxAge = maxAge or 5 * lease
+        self.maxAttempts = maxAttempts
+        self.claimed = dict()
+        self.lock = threading.Lock()
+        if not self.fileName.parent.is_dir():
+            self.fileName.parent.mkdir(parents=True, exist_ok=True)
+        self.db = self._connect()
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('''CREATE TABLE IF NOT EXISTS queue (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL UNIQUE,
+            priority INTEGER NOT NULL DEFAULT 0,
+            state INTEGER NOT NULL DEFAULT 0,
+            owner TEXT,
+            expires REAL,
+            attempts INTEGER NOT NULL DEFAULT 0)''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS queue_claim ON queue (state, priority, seq)')
+        self.stopped = threading.Event()
+        self.renewer = None
+
+    def _connect(self):
+        return sqlite3.connect(self.fileName, timeout=60, isolation_level=None, check_same_thread=False)
+
+    def push(self, urls, priority=0):
+        added = list()
+        with self._transaction():
+            for url in urls:
+                cur = self.db.execute('INSERT OR IGNORE INTO queue (url, priority) VALUES (?, ?)', (url, priority))
+                if cur.rowcount:
+                    added.append(url)
+        return added
+
+    def requeue(self, url, priority=0):
+        self._unclaim(url)
+        self.db.execute('''INSERT INTO queue (url, priority) VALUES (?, ?)
+            ON CONFLICT (url) DO UPDATE SET state = ?, owner = NULL, expires = NULL, priority = excluded.priority''',
+            (url, priority, QUEUED))
+
+    def claim(self, n=1):
+        now = time.time()
+        with self._transaction():
+            if self.maxAttempts:
+                for url, in self.db.execute('''UPDATE queue SET state = ?, owner = NULL, expires = NULL
+                    WHERE state = ? AND expires < ? AND attempts >= ? RETURNING url''',
+                    (ABANDONED, LEASED, now, self.maxAttempts)).fetchall():
+                    print(f'giving up on {url}', file=sys.stderr)
+            urls = [url for url, in self.db.execute('''SELECT url FROM queue
+                WHERE state = ? OR (state = ? AND expires < ?)
+                ORDER BY priority, seq LIMIT ?''', (QUEUED, LEASED, now, n))]
+            self.db.executemany('''UPDATE queue SET state = ?, owner = ?, expires = ?, attempts = attempts + 1
+                WHERE url = ?''', [(LEASED, self.owner, now + self.lease, url) for url in urls])
+        if urls:
+            with self.lock:
+                self.claimed.update((url, now) for url in urls)
+            self._start_renewer()
+        return urls
+
+    def renew(self, db=None):
+        db = db or self.db
+        now = time.time()
+        with self.lock:
+            urls = [url for url, claimed in self.claimed.items() if now - claimed < self.maxAge]
+        db.executemany('UPDATE queue SET expires = ? WHERE url = ? AND state = ? AND owner = ?',
+            [(now + self.lease, url, LEASED, self.owner) for url in urls])
+
+    def attempts(self, url):
+        for n, in self.db.execute('SELECT attempts FROM queue WHERE url = ?', (url,)):
+            return n
+        return 0
+
+    def done(self, url):
+        self._unclaim(url)
+        self.db.execute('UPDATE queue SET state = ?, owner = NULL, expires = NULL WHERE url = ?', (DONE, url))
+
+    def release(self):
+        with self.lock:
+            self.claimed.clear()
+        self.db.execute('UPDATE queue SET state = ?, owner = NULL, expires = NULL WHERE state = ? AND owner = ?',
+            (QUEUED, LEASED, self.owner))
+
+    def remaining(self):
+        for n, in self.db.execute('SELECT COUNT(*) FROM queue WHERE state IN (?, ?)', (QUEUED, LEASED)):
+            return n
+
+    def urls(self, state=QUEUED):
+        return [url for url, in self.db.execute('SELECT url FROM queue WHERE state = ? ORDER BY priority, seq', (state,))]
+
+    def stats(self):
+        names = {QUEUED: 'queued', LEASED: 'leased', DONE: 'done', ABANDONED: 'abandoned'}
+        return {names[state]: n for state, n in self.db.execute('SELECT state, COUNT(*) FROM queue GROUP BY state')}
+
+    def clear(self):
+        self.db.execute('DELETE FROM queue')
+
+    def close(self):
+        self.stopped.set()
+        if self.renewer:
+            self.renewer.join()
+            self.renewer = None
+        self.release()
+        self.db.close()
+
+    @contextmanager
+    def _transaction(self):
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        self.db.execute('COMMIT')
+
+    def _unclaim(self, url):
+        with self.lock:
+            self.claimed.pop(url, None)
+
+    def _start_renewer(self):
+        if self.renewer is None:
+            self.renewer = threading.Thread(target=self._renew_loop, daemon=True)
+            self.renewer.start()
+
+    def _renew_loop(self):
+        db = self._connect()
+        try:
+            while not self.stopped.wait(self.heartbeat):
+                try:
+                    self.renew(db)
+                except sqlite3.OperationalError:
+                    pass
+        finally:
+            db.close()
+
+
+class SharedFrontier:
+    def __init__(self, queue, urls=(), poll=0.5):
+        self.queue = queue
+        self.poll = poll
+        self.queue.push(urls)
+
+    def push(self, url, priority=0, force=False):
+        if force:
+            self.queue.requeue(url, priority)
+            return True
+        return bool(self.queue.push([url], priority))
+
+    def pop(self):
+        for url in self.queue.claim():
+            return url
+
+    def wait(self):
+        time.sleep(self.poll)
+
+    def __len__(self):
+        return self.queue.remaining()
+
+    def __iter__(self):
+        return iter(self.queue.urls())
+
+
+class SharedState(CrawlerState):
+    fileName = 'workqueue.sqlite'
+    lease = 120
+
+    def __init__(self, fileName=None):
+        super().__init__(fileName=fileName)
+        self.queue = None
+
+    def visit(self, crawler, url):
+        self.queue.done(url)
+
+    def requeues(self, crawler, url):
+        return max(0, self.queue.attempts(url) - 1)
+
+    def save(self, crawler):
+        pass
+
+    def restore(self, crawler):
+        if self.queue is None:
+            self.queue = WorkQueue(crawler.dumpDir / self.fileName, lease=self.lease, maxAttempts=crawler.retries + 1)
+        crawler.visited = set()
+        crawler.fringe = SharedFrontier(self.queue, map(crawler.norm, [crawler.rootUrl]))
+
+    def reset(self, crawler):
+        self.queue.clear()
+        self.restore(crawler)
+
+    def close(self):
+        if self.queue:
+            self.queue.close()
+            self.queue = None
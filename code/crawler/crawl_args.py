@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+"""
+author: paiv, https://github.com/paiv/
+"""
+
+import core
+
+
+PL_URL = 'https://www.zkwp.pl/wzorce.php'
+UK_URL = 'https://uku.com.ua/plem_work/breed_fci/'
+
+
+def fci_arguments(parser):
+    parser.add_argument('-l', '--language', default='en', help='Language identifier, en|fr|de|es')
+    parser.add_argument('--url', help='Base URL, default is https://www.fci.be/<language>/nomenclature/')
+    parser.add_argument('--languages', type=lambda s: s.split(','),
+        help='Extract these languages from a single crawl, e.g. en,fr,de,es; others are dumped to <data-dir>/fci-<lang>')
+    parser.add_argument('--migrate', action='store_true', help='Import dump/*/entry.json into the store and exit')
+
+
+def pl_arguments(parser):
+    parser.add_argument('-l', '--language', default='pl', help='Language identifier')
+    parser.add_argument('url', nargs='?', default=PL_URL, help='Base URL')
+
+
+def uk_arguments(parser):
+    parser.add_argument('-l', '--language', default='uk', help='Language identifier')
+    parser.add_argument('url', nargs='?', default=UK_URL, help='Base URL')
+
+
+ARGUMENTS = dict(fci=fci_arguments, pl=pl_arguments, uk=uk_arguments)
+
+
+def parser(source, prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog)
+    core.add_crawler_arguments(parser)
+    ARGUMENTS[source](parser)
+    return parser
@@ -4,22 +4,49 @@ author: paiv, https://github.com/paiv/
 """
 
 import core
+import crawl_args
+import json
 import re
+import sys
 from lxml import html
 from pathlib import Path
 from urllib.parse import urlsplit, urlunsplit, urljoin
 
 
+def clean_group(text):
+    if text:
+        ps = text.split('-')
+        text = ps[len(ps) > 1]
+        return text.split('(')[0].strip()
+
+
 class FciParser(core.Parser):
-    def __init__(self, language='en'):
+    xpItems = core.xpath('//td[contains(@class, "race")]/a[contains(@class, "nom")]')
+    xpLinks = core.xpath('//div[contains(@class, "group")]/a/@href')
+    xpSpan = core.xpath('//span[@id=$id]/text()')
+    xpSpanMatch = core.xpath('//span[re:match(@id, $rx, "i")]/text()')
+    xpAnchor = core.xpath('//a[@id=$id]//text()')
+    xpHref = core.xpath('//a[@id=$id]/@href')
+    xpHrefMatch = core.xpath('//a[re:match(@id, $rx, "i")]/@href')
+    xpImage = core.xpath('//img[@id=$id]/@src')
+    rxListing = re.compile(r'/nomenclature/(groupe\.aspx)?$', re.I)
+    streaming = True
+
+    def __init__(self, language='en', languages=None):
         self.language = language
+        self.languages = languages
         self.rxfciid = re.compile(r'\((\d+)\)')
+        self.nameId, self.pdfId = self.ids(language)
+
+    def ids(self, language):
+        lang = language.upper()
+        return f'ContentPlaceHolder1_Nom{lang}Label', f'ContentPlaceHolder1_Standard{lang}HyperLink'
 
     def getcontent(self, request):
         return {'url': request.url, 'body': html.fromstring(request.content)}
 
     def items(self, page):
-        breeds = [self.item(x, page['url']) for x in page['body'].xpath('//td[contains(@class, "race")]/a[contains(@class, "nom")]')]
+        breeds = [self.item(x, page['url']) for x in self.xpItems(page['body'])]
         return breeds
 
     def item(self, el, baseurl):
@@ -32,48 +59,111 @@ class FciParser(core.Parser):
         return {'refid':refid, 'url':url, '_partial':True}
 
     def parse(self, item, page):
-        lang = self.language.upper()
         body = page['body']
-        exslt = {'re': 'http://exslt.org/regular-expressions'}
 
-        def text(xpath):
-            el = ' '.join([s.strip() for s in body.xpath(xpath, namespaces=exslt)])
+        def text(values):
+            el = ' '.join([s.strip() for s in values])
             if el:
                 return el.strip()
 
-        def clean_group(text):
-            if text:
-                ps = text.split('-')
-                text = ps[len(ps) > 1]
-                return text.split('(')[0].strip()
-
-        def url(xpath, skip=None):
-            for el in body.xpath(xpath, namespaces=exslt):
+        def url(values, skip=None):
+            for el in values:
                 s = el.strip()
                 if not (skip and skip(s)):
                     return urljoin(page['url'], s)
 
-        item['name'] = text(f'//span[re:match(@id,"ContentPlaceHolder1_Nom{lang}Label","i")]/text()')
-        item['group'] = clean_group(text('//a[@id="ContentPlaceHolder1_GroupeHyperLink"]//text()'))
-        item['section'] = text('//span[@id="ContentPlaceHolder1_SectionLabel"]/text()')
-        item['country'] = text('//span[@id="ContentPlaceHolder1_PaysOrigineLabel"]/text()')
+        def byid(xp, xpmatch, id):
+            return xp(body, id=id) or xpmatch(body, rx=id)
+
+        item['name'] = text(byid(self.xpSpan, self.xpSpanMatch, self.nameId))
+        item['group'] = clean_group(text(self.xpAnchor(body, id='ContentPlaceHolder1_GroupeHyperLink')))
+        item['section'] = text(self.xpSpan(body, id='ContentPlaceHolder1_SectionLabel'))
+        item['country'] = text(self.xpSpan(body, id='ContentPlaceHolder1_PaysOrigineLabel'))
         del item['_partial']
 
         def stdana(s): return s.startswith('/Nomenclature/Illustrations/STD-ANA-')
-        imgUrl = url('//img[@id="ContentPlaceHolder1_IllustrationsRepeater_Image1_0"]/@src', stdana)
+        imgUrl = url(self.xpImage(body, id='ContentPlaceHolder1_IllustrationsRepeater_Image1_0'), stdana)
         if imgUrl: item['thumb'] = imgUrl
 
-        pdfUrl = url(f'//a[re:match(@id,"ContentPlaceHolder1_Standard{lang}HyperLink","i")]/@href')
+        pdfUrl = url(byid(self.xpHref, self.xpHrefMatch, self.pdfId))
         if pdfUrl: item['pdf'] = pdfUrl
 
-        provDate = text('//span[@id="ContentPlaceHolder1_DateReconnaissanceProvisoireLabel"]/text()')
-        status = text('//span[@id="ContentPlaceHolder1_StatutLabel"]/text()')
+        provDate = text(self.xpSpan(body, id='ContentPlaceHolder1_DateReconnaissanceProvisoireLabel'))
+        status = text(self.xpSpan(body, id='ContentPlaceHolder1_StatutLabel'))
         if 'provis' in status.lower() and provDate: item['provisional'] = provDate
 
+        if self.languages:
+            item['i18n'] = dict()
+            for lang in self.languages:
+                nameId, pdfId = self.ids(lang)
+                item['i18n'][lang] = {
+                    'name': text(byid(self.xpSpan, self.xpSpanMatch, nameId)),
+                    'pdf': url(byid(self.xpHref, self.xpHrefMatch, pdfId)),
+                }
+
         return item
 
     def links(self, page):
-        return [urljoin(page['url'], x) for x in page['body'].xpath('//div[contains(@class, "group")]/a/@href')]
+        return [urljoin(page['url'], x) for x in self.xpLinks(page['body'])]
+
+    def priority(self, url):
+        return 0 if self.rxListing.search(urlsplit(url).path) else 2
+
+    def stream(self, chunks, url):
+        def classed(el, tag, name):
+            return el is not None and el.tag == tag and name in (el.get('class') or '')
+
+        def match(el):
+            if el.tag != 'a':
+                return False
+            parent = el.getparent()
+            return (classed(parent, 'td', 'race') and classed(el, 'a', 'nom')) or classed(parent, 'div', 'group')
+
+        for el in core.stream_roots(chunks, match):
+            parent = el.getparent()
+            if classed(parent, 'td', 'race') and classed(el, 'a', 'nom'):
+                yield 'item', self.item(el, url)
+            if classed(parent, 'div', 'group') and (href := el.get('href')) is not None:
+                yield 'link', urljoin(url, href)
+
+
+class FciListingParser(FciParser):
+    xpGroups = core.xpath('//div[contains(@class, "group")]/a')
+    xpCountry = core.xpath('../following-sibling::td[contains(@class, "pays")]//text()')
+    streaming = False
+
+    def __init__(self, language='en', labels=None):
+        super().__init__(language=language)
+        self.groups = dict()
+        self.labels = labels
+
+    def items(self, page):
+        group = self.groups.get(page['url'])
+        sampled = set()
+        breeds = list()
+        for el in self.xpItems(page['body']):
+            item = self.item(el, page['url'])
+            del item['_partial']
+            if group:
+                item['group'] = group
+            if (country := ' '.join(s.strip() for s in self.xpCountry(el)).strip()):
+                item['country'] = country
+            if self.labels and (section := self.labels.unknown(item)) and section not in sampled:
+                sampled.add(section)
+                item['_partial'] = True
+            breeds.append(item)
+        return breeds
+
+    def links(self, page):
+        urls = list()
+        for el in self.xpGroups(page['body']):
+            if (href := el.get('href')) is None:
+                continue
+            url = urljoin(page['url'], href)
+            if (group := clean_group(' '.join(el.itertext()).strip())):
+                self.groups[url] = group
+            urls.append(url)
+        return urls
 
 
 class FciDumper(core.Dumper):
@@ -95,6 +185,12 @@ class FciDumper(core.Dumper):
     def todir(self, item):
         return self.dumpDir / 'dump' / item['refid']
 
+    def load(self, item):
+        fn = self.todir(item) / 'entry.json'
+        if fn.is_file():
+            with open(fn, 'r') as fp:
+                return json.load(fp)
+
     def meta(self, item, todir, crawler):
         fn = todir / 'entry.json'
         core.jsondump(item, fn)
@@ -104,32 +200,151 @@ class FciDumper(core.Dumper):
             fn.unlink()
 
 
+class FciStoreDumper(core.Dumper):
+    def __init__(self, dir):
+        super().__init__(dir)
+        self.store = core.DumpStore(self.dumpDir / 'dump.sqlite')
+
+    def dump(self, item, crawler):
+        if not item:
+            return
+        self.store.put(item['refid'], item)
+
+    def exists(self, item):
+        return item['refid'] in self.store
+
+    def load(self, item):
+        return self.store.get(item['refid'])
+
+    def flush(self):
+        self.store.commit()
+
+    def reset(self):
+        self.store.clear()
+
+    def migrate(self):
+        n = 0
+        for fn in sorted(self.dumpDir.glob('dump/*/entry.json')):
+            with open(fn, 'r') as fp:
+                item = json.load(fp)
+            self.store.put(item['refid'], item)
+            n += 1
+        self.store.commit()
+        return n
+
+
+class FciMultiDumper(core.Dumper):
+    def __init__(self, dumpers):
+        super().__init__(next(iter(dumpers.values())).dumpDir)
+        self.dumpers = dumpers
+
+    def dump(self, item, crawler):
+        if not item:
+            return
+        i18n = item.pop('i18n', dict())
+        for lang, dumper in self.dumpers.items():
+            entry = dict(item)
+            if (loc := i18n.get(lang)):
+                entry['name'] = loc['name'] or entry['name']
+                entry.pop('pdf', None)
+                if loc['pdf']:
+                    entry['pdf'] = loc['pdf']
+            dumper.dump(entry, crawler)
+
+    def exists(self, item):
+        return all(dumper.exists(item) for dumper in self.dumpers.values())
+
+    def flush(self):
+        for dumper in self.dumpers.values():
+            dumper.flush()
+
+    def reset(self):
+        for dumper in self.dumpers.values():
+            dumper.reset()
+
+    def migrate(self):
+        return sum(dumper.migrate() for dumper in self.dumpers.values())
+
+
+class FciLabelDumper(core.Dumper):
+    def __init__(self, target):
+        super().__init__(target.dumpDir)
+        self.target = target
+        self.sections = dict()
+
+    def unknown(self, item):
+        if (entry := self.target.load(item)) and (section := entry.get('section')) not in self.sections:
+            return section
+
+    def dump(self, item, crawler):
+        if (entry := self.target.load(item)):
+            if (section := entry.get('section')):
+                if item.get('section'):
+                    self.sections[section] = item['section']
+                elif section in self.sections:
+                    item['section'] = self.sections[section]
+            entry.update((k, v) for k, v in item.items() if v)
+            self.target.dump(entry, crawler)
+
+    def flush(self):
+        self.target.flush()
+
+    def reset(self):
+        pass
+
+
 class FciCrawler:
-    def __init__(self, url, basedir, language='en', parser=None, dumper=None):
+    def __init__(self, url, basedir, language='en', parser=None, dumper=None, store=False, languages=None,
+            dirname='fci', **options):
         base_url = url or f'https://www.fci.be/{language}/nomenclature/'
-        todir = Path(basedir) / 'fci'
-        parser = parser or FciParser(language=language)
-        dumper = dumper or FciDumper(todir)
+        todir = Path(basedir) / dirname
+        Dumper = FciStoreDumper if store else FciDumper
+        self.labels = list()
+        if languages:
+            languages = [language] + [x for x in languages if x != language]
+            dumpers = {language: dumper or Dumper(todir)}
+            for lang in languages[1:]:
+                name = f'fci-{lang}-labels'
+                metrics = options.get('metrics')
+                dumpers[lang] = Dumper(Path(basedir) / f'fci-{lang}')
+                labelDumper = FciLabelDumper(dumpers[lang])
+                labels = core.Crawler(name=name, dir=dumpers[lang].dumpDir,
+                    url=base_url.replace(f'/{language}/', f'/{lang}/', 1),
+                    parser=FciListingParser(language=lang, labels=labelDumper), dumper=labelDumper,
+                    **(options | dict(processes=None, metrics=metrics.sibling(name) if metrics else None)))
+                self.labels.append(labels)
+            dumper = FciMultiDumper(dumpers)
+        parser = parser or FciParser(language=language, languages=languages)
+        dumper = dumper or Dumper(todir)
         self.engine = core.Crawler(name='fci', dir=todir, url=base_url,
-            parser=parser, dumper=dumper)
+            parser=parser, dumper=dumper, **options)
 
     def crawl(self):
-        return self.engine.crawl()
+        self.engine.crawl()
+        for labels in self.labels:
+            labels.crawl()
 
     def reset(self):
         self.engine.reset()
+        for labels in self.labels:
+            labels.state.reset(labels)
 
 
-if __name__ == '__main__':
-    import argparse
-
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--reset', action='store_true', help='Reset data')
-    parser.add_argument('-o', '--data-dir', default='data', help='Data directory')
-    parser.add_argument('-l', '--language', default='en', help='Language identifier, en|fr|de|es')
-    args = parser.parse_args()
-
-    craw = FciCrawler(url=None, basedir=args.data_dir, language=args.language)
+def main(args):
+    craw = FciCrawler(url=args.url, basedir=args.data_dir, language=args.language,
+        languages=args.languages, **(core.crawler_options(args, 'fci') | dict(store=args.store or args.migrate)))
+    if args.migrate:
+        n = craw.engine.dumper.migrate()
+        print(f'migrated {n} entries', file=sys.stderr)
+        return
     if args.reset:
         craw.reset()
     craw.crawl()
+
+
+def cli(argv=None, prog=None):
+    main(crawl_args.parser('fci', prog=prog).parse_args(argv))
+
+
+if __name__ == '__main__':
+    cli()
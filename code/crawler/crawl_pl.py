@@ -1,22 +1,35 @@
 #!/usr/bin/env python
 import core
+import crawl_args
 import re
 from collections import defaultdict
 from lxml import html
 from pathlib import Path
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
 from crawl_fci import FciCrawler, FciDumper
 
 
+BASE_URL = crawl_args.PL_URL
+
+
 class PlParser(core.Parser):
+    xpCards = core.xpath('//div[@class = "card"]')
+    xpHeader = core.xpath('descendant::div[@class = "card-header"]/descendant::*/text()')
+    xpBody = core.xpath('descendant::div[@class = "card-body"]')
+    xpAnchors = core.xpath('descendant::a')
+    xpCardTree = core.xpath('descendant-or-self::div[@class = "card"]')
+    streaming = True
 
     def getcontent(self, request):
         return {'url': request.url, 'body': html.fromstring(request.content)}
 
     def items(self, page):
-        def text(body, xpath):
-            exslt = {'re': 'http://exslt.org/regular-expressions'}
-            s = ' '.join([s.strip() for s in body.xpath(xpath, namespaces=exslt)])
+        for group_el in self.xpCards(page['body']):
+            yield from self.card_items(group_el, page['url'])
+
+    def card_items(self, group_el, url):
+        def text(body, xp):
+            s = ' '.join([s.strip() for s in xp(body)])
             if s:
                 return ' '.join(s.split())
 
@@ -36,51 +49,56 @@ class PlParser(core.Parser):
                 ps.pop()
             return ' '.join(ps) if ps else res
 
-        group = None
-        section = None
-
         patch = {
             '59': 'Gończy szwajcarski',
             '60': 'Gończy szwajcarski krótkonożny',
             '97': 'Szpic niemiecki',
         }
 
-        for group_el in page['body'].xpath('//div[@class = "card"]'):
-            group = text(group_el, 'descendant::div[@class = "card-header"]/descendant::*/text()')
-            group = re.split(r'\d+\s*', group, maxsplit=1)[-1]
-
-            card, = group_el.xpath('descendant::div[@class = "card-body"]')
-            names = defaultdict(list)
-            seen = dict()
-            urls = dict()
-
-            for row in card.xpath('descendant::a'):
-                href = row.attrib['href']
-                rid = Path(href).stem
-                if not rid.isdigit():
-                    raise Exception(f'invalid id {rid!r}')
-
-                name = row.text
-                if (p := patch.get(rid)):
-                    name = p
-                elif (prev := seen.get(rid)):
-                    name = merge(name, prev)
-                names[rid].append(name)
-
-                seen[rid] = name.strip()
-                urls[rid] = urljoin(page['url'], href)
-
-            for rid, name in seen.items():
-                item = dict()
-                item['refid'] = rid
-                item['url'] = page['url']
-                item['group'] = group
-                item['name'] = name
-                if (irl := urls[rid]).lower().endswith('.pdf'):
-                    item['pdf'] = irl
-                else:
-                    item['url'] = irl
-                yield item
+        group = text(group_el, self.xpHeader)
+        group = re.split(r'\d+\s*', group, maxsplit=1)[-1]
+
+        card, = self.xpBody(group_el)
+        names = defaultdict(list)
+        seen = dict()
+        urls = dict()
+
+        for row in self.xpAnchors(card):
+            href = row.attrib['href']
+            rid = Path(href).stem
+            if not rid.isdigit():
+                raise Exception(f'invalid id {rid!r}')
+
+            name = row.text
+            if (p := patch.get(rid)):
+                name = p
+            elif (prev := seen.get(rid)):
+                name = merge(name, prev)
+            names[rid].append(name)
+
+            seen[rid] = name.strip()
+            urls[rid] = urljoin(url, href)
+
+        for rid, name in seen.items():
+            item = dict()
+            item['refid'] = rid
+            item['url'] = url
+            item['group'] = group
+            item['name'] = name
+            if (irl := urls[rid]).lower().endswith('.pdf'):
+                item['pdf'] = irl
+            else:
+                item['url'] = irl
+            yield item
+
+    def stream(self, chunks, url):
+        def match(el):
+            return el.tag == 'div' and el.get('class') == 'card'
+
+        for root in core.stream_roots(chunks, match):
+            for group_el in self.xpCardTree(root):
+                for item in self.card_items(group_el, url):
+                    yield 'item', item
 
     def parse(self, item, page):
         raise Exception()
@@ -88,22 +106,21 @@ class PlParser(core.Parser):
     def links(self, page):
         return list()
 
+    def priority(self, url):
+        return 0 if urlsplit(url).path.endswith('/wzorce.php') else 2
+
 
 def main(args):
-    craw = FciCrawler(url=args.url, basedir=args.data_dir, parser=PlParser())
+    craw = FciCrawler(url=args.url, basedir=args.data_dir, parser=PlParser(),
+        **core.crawler_options(args, 'pl'))
     if args.reset:
         craw.reset()
     craw.crawl()
 
 
+def cli(argv=None, prog=None):
+    main(crawl_args.parser('pl', prog=prog).parse_args(argv))
+
+
 if __name__ == '__main__':
-    import argparse
-
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--reset', action='store_true', help='Reset data')
-    parser.add_argument('-o', '--data-dir', default='data', help='Data directory')
-    parser.add_argument('-l', '--language', default='pl', help='Language identifier')
-    parser.add_argument('url', nargs='?', help='Base URL',
-        default='https://www.zkwp.pl/wzorce.php')
-    args = parser.parse_args()
-    main(args)
+    cli()
@@ -1,42 +1,60 @@
 #!/usr/bin/env python
 import core
+import crawl_args
 import re
 import string
 from lxml import html
 from pathlib import Path
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
 from crawl_fci import FciCrawler, FciDumper
 
 
+BASE_URL = crawl_args.UK_URL
+
+
 class UkParser(core.Parser):
+    xpTables = core.xpath('//table[child::tr/td[contains(@class, "breed_tx")]]')
+    xpTableRows = core.xpath('tr')
+    xpBodyTables = core.xpath('//table[child::tbody/tr/td[contains(@class, "breed_tx")]]')
+    xpBodyRows = core.xpath('tbody/tr')
+    xpCells = core.xpath('td')
+    xpCellText = core.xpath('descendant::text()')
+    xpCellAnchors = core.xpath('td/a')
+    xpLinks = core.xpath('//td[contains(@class, "tx_osnova_mid")]/a/@href')
+    xpTableTree = core.xpath('descendant-or-self::table[child::tr/td[contains(@class, "breed_tx")]]')
+    xpBodyTableTree = core.xpath('descendant-or-self::table[child::tbody/tr/td[contains(@class, "breed_tx")]]')
+    xpLinkTree = core.xpath('descendant-or-self::td[contains(@class, "tx_osnova_mid")]/a/@href'
+        ' | self::a[parent::td[contains(@class, "tx_osnova_mid")]]/@href')
+    rxListing = re.compile(r'/breed_fci/(\d+\.html)?$')
+    streaming = True
 
     def getcontent(self, request):
         return {'url': request.url, 'body': html.fromstring(request.content)}
 
     def items(self, page):
-        def text(body, xpath):
-            exslt = {'re': 'http://exslt.org/regular-expressions'}
-            s = ' '.join([s.strip() for s in body.xpath(xpath, namespaces=exslt)])
-            if s:
-                return ' '.join(s.split())
-
         def filter_rows(page):
-            xp = '//table[child::tr/td[contains(@class, "breed_tx")]]'
-            for table in page['body'].xpath(xp):
-                yield from table.xpath('tr')
+            for table in self.xpTables(page['body']):
+                yield from self.xpTableRows(table)
+
+            for table in self.xpBodyTables(page['body']):
+                yield from self.xpBodyRows(table)
 
-            xp = '//table[child::tbody/tr/td[contains(@class, "breed_tx")]]'
-            for table in page['body'].xpath(xp):
-                yield from table.xpath('tbody/tr')
+        return self.row_items(filter_rows(page), page['url'])
+
+    def row_items(self, rows, url):
+        def text(body, xp):
+            s = ' '.join([s.strip() for s in xp(body)])
+            if s:
+                return ' '.join(s.split())
 
         group = None
         section = None
 
-        if page['url'].endswith('09.html'):
+        if url.endswith('09.html'):
             group = 'Собаки-компаньйони та декоративні собаки'
 
-        for tr in filter_rows(page):
-            ps = [text(td, 'descendant::text()') for td in tr.xpath('td')]
+        for tr in rows:
+            ps = [text(td, self.xpCellText) for td in self.xpCells(tr)]
             if not ps: continue
 
             if (s := ps[0]) and re.match(r'^\s*Group', s, flags=re.I):
@@ -54,25 +72,55 @@ class UkParser(core.Parser):
             if (rid := ps[1]) and rid.isdigit() and (rid != '0'):
                 item = dict()
                 item['refid'] = rid
-                item['url'] = page['url']
+                item['url'] = url
                 item['group'] = group
                 item['section'] = section
                 item['name'] = self._normalize(ps[4])
                 item['country'] = self._normalize(ps[2])
-                for a in tr.xpath('td/a'):
+                for a in self.xpCellAnchors(tr):
                     if a.text == 'UA':
-                        href = urljoin(page['url'], a.attrib['href'])
+                        href = urljoin(url, a.attrib['href'])
                         if href.lower().endswith('.pdf'):
                             item['pdf'] = href
                         else:
                             item['url'] = href
                 yield item
 
+    def stream(self, chunks, url):
+        def match(el):
+            if el.tag == 'table':
+                return True
+            parent = el.getparent()
+            return el.tag == 'a' and parent is not None and parent.tag == 'td' and 'tx_osnova_mid' in (parent.get('class') or '')
+
+        links = list()
+        bodyTables = list()
+
+        def filter_rows():
+            for root in core.stream_roots(chunks, match):
+                links.extend(urljoin(url, x) for x in self.xpLinkTree(root))
+                for table in self.xpTableTree(root):
+                    yield from self.xpTableRows(table)
+                bodyTables.extend(self.xpBodyTableTree(root))
+
+            for table in bodyTables:
+                yield from self.xpBodyRows(table)
+
+        for item in self.row_items(filter_rows(), url):
+            while links:
+                yield 'link', links.pop(0)
+            yield 'item', item
+        for link in links:
+            yield 'link', link
+
     def parse(self, item, page):
         raise Exception()
 
     def links(self, page):
-        return [urljoin(page['url'], x) for x in page['body'].xpath('//td[contains(@class, "tx_osnova_mid")]/a/@href')]
+        return [urljoin(page['url'], x) for x in self.xpLinks(page['body'])]
+
+    def priority(self, url):
+        return 0 if self.rxListing.search(urlsplit(url).path) else 2
 
     _abcs = set(string.ascii_letters)
     _apos = re.compile(r"['`]")
@@ -86,20 +134,16 @@ class UkParser(core.Parser):
 
 
 def main(args):
-    craw = FciCrawler(url=args.url, basedir=args.data_dir, parser=UkParser())
+    craw = FciCrawler(url=args.url, basedir=args.data_dir, parser=UkParser(),
+        **core.crawler_options(args, 'uk'))
     if args.reset:
         craw.reset()
     craw.crawl()
 
 
+def cli(argv=None, prog=None):
+    main(crawl_args.parser('uk', prog=prog).parse_args(argv))
+
+
 if __name__ == '__main__':
-    import argparse
-
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--reset', action='store_true', help='Reset data')
-    parser.add_argument('-o', '--data-dir', default='data', help='Data directory')
-    parser.add_argument('-l', '--language', default='uk', help='Language identifier')
-    parser.add_argument('url', nargs='?', help='Base URL',
-        default='https://uku.com.ua/plem_work/breed_fci/')
-    args = parser.parse_args()
-    main(args)
+    cli()
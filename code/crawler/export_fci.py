@@ -4,40 +4,277 @@ author: paiv, https://github.com/paiv/
 """
 
 import csv
+import hashlib
+import heapq
+import itertools
 import json
+import sqlite3
+import sys
 from pathlib import Path
 
 
-def export_from(datadir, tofile):
-    data = []
-    for fn in Path(datadir).glob('**/entry.json'):
+def iter_entries(datadir):
+    path = Path(datadir)
+    if path.is_file():
+        db = sqlite3.connect(path)
+        try:
+            for data, in db.execute('SELECT data FROM entries ORDER BY CAST(key AS INTEGER), key'):
+                yield json.loads(data)
+        finally:
+            db.close()
+        return
+
+    def key(fn):
+        name = fn.parent.name
+        return (0, int(name), name) if name.isdigit() else (1, 0, name)
+
+    for fn in sorted(path.glob('**/entry.json'), key=key):
         with open(fn, 'r') as fp:
-            entry = json.load(fp)
-            data.append(entry)
+            yield json.load(fp)
+
+
+FIELDS = ['id','name','group','section','provisional','country','url','image','pdf']
+LOCALIZED = ['name','group','section','country','url','pdf']
+INDEXED = ['group','section','country']
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.sqlite': 'sqlite', '.db': 'sqlite',
+    '.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow'}
+
+
+def iter_rows(datadir):
+    for entry in iter_entries(datadir):
+        row = {k: entry.get(k) for k in FIELDS}
+        row['id'] = int(entry['refid'])
+        row['image'] = entry.get('thumb')
+        yield row
+
+
+def join_fields(sources):
+    return ['id','provisional','image'] + [f'{k}_{lang}' for lang, _ in sources for k in LOCALIZED]
+
+
+def join_rows(sources):
+    def keyed(lang, datadir):
+        for entry in iter_entries(datadir):
+            yield int(entry['refid']), lang, entry
+
+    streams = [keyed(lang, datadir) for lang, datadir in sources]
+    merged = heapq.merge(*streams, key=lambda x: x[0])
+
+    for refid, group in itertools.groupby(merged, key=lambda x: x[0]):
+        row = {'id': refid}
+        for _, lang, entry in group:
+            row['provisional'] = row.get('provisional') or entry.get('provisional')
+            row['image'] = row.get('image') or entry.get('thumb')
+            for k in LOCALIZED:
+                row[f'{k}_{lang}'] = entry.get(k)
+        yield row
+
+
+def export_from(datadir, tofile):
+    write_csv(iter_rows(datadir), FIELDS, tofile)
+
+
+def join_from(sources, tofile):
+    write_csv(join_rows(sources), join_fields(sources), tofile)
+
+
+def guess_format(fn):
+    return FORMATS.get(Path(str(fn)).suffix.lower(), 'csv')
+
+
+def export(rows, fields, fn, format=None):
+    format = format or guess_format(fn)
+    writer = WRITERS[format]
+    if format in ('csv', 'jsonl'):
+        if fn in (None, '-'):
+            return writer(rows, fields, sys.stdout)
+        with open(fn, 'w') as fp:
+            return writer(rows, fields, fp)
+    if fn in (None, '-'):
+        raise Exception(f'{format} output needs a file name')
+    return writer(rows, fields, fn)
+
+
+def export_incremental(rows, fields, fn, format=None, changes=None):
+    if fn in (None, '-'):
+        raise Exception('incremental export needs a file name')
+    fn = Path(fn)
+    rows = list(rows)
+    hashes = {str(row['id']): row_hash(row, fields) for row in rows}
+
+    manifest = Path(f'{fn}.manifest.json')
+    known = dict()
+    if manifest.is_file():
+        with open(manifest, 'r') as fp:
+            known = json.load(fp).get('rows', dict())
+
+    if fn.exists() and hashes == known:
+        if changes:
+            return write_changes({'added': [], 'removed': [], 'modified': []}, changes)
+        return None
+
+    previous = {str(row['id']): row for row in load(fn, format)} if fn.exists() else dict()
+    if not known:
+        known = {k: row_hash(row, fields) for k, row in previous.items()}
+
+    changeset = {'added': [], 'removed': [], 'modified': []}
+    for row in rows:
+        key = str(row['id'])
+        if key not in known:
+            changeset['added'].append(row)
+        elif known[key] != hashes[key]:
+            old = previous.get(key, dict())
+            diff = {k: [old.get(k), row.get(k)] for k in fields if old.get(k) != row.get(k)}
+            changeset['modified'].append({'id': row['id'], 'changes': diff})
+    changeset['removed'] = sorted((int(k) for k in known if k not in hashes))
+
+    export(rows, fields, fn, format)
+    with open(manifest, 'w') as fp:
+        json.dump({'fields': fields, 'rows': hashes}, fp, ensure_ascii=False, sort_keys=True, indent=2)
+
+    if changes:
+        write_changes(changeset, changes)
+
+    return changeset
+
 
-    data = sorted(data, key=lambda x: int(x['refid']))
+def write_changes(changeset, fn):
+    with open(fn, 'w') as fp:
+        json.dump(changeset, fp, ensure_ascii=False, indent=2)
+    return changeset
 
-    writer = csv.DictWriter(tofile, ['id','name','group','section','provisional','country','url','image','pdf'])
+
+def row_hash(row, fields):
+    data = json.dumps([row.get(k) for k in fields], ensure_ascii=False)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def load(fn, format=None):
+    return READERS[format or guess_format(fn)](fn)
+
+
+def write_csv(rows, fields, fp):
+    writer = csv.DictWriter(fp, fields)
     writer.writeheader()
+    writer.writerows(rows)
 
-    for entry in data:
-        entry['id'] = entry['refid']
-        entry.pop('refid')
-        entry['image'] = None
-        if 'thumb' in entry:
-            entry['image'] = entry['thumb']
-            entry.pop('thumb')
 
-        writer.writerow(entry)
+def write_jsonl(rows, fields, fp):
+    for row in rows:
+        fp.write(json.dumps({k: row.get(k) for k in fields}, ensure_ascii=False))
+        fp.write('\n')
 
 
-if __name__ == '__main__':
+def write_sqlite(rows, fields, fn):
+    fn = Path(fn)
+    if fn.exists():
+        fn.unlink()
+    columns = ', '.join(f'"{k}" INTEGER PRIMARY KEY' if k == 'id' else f'"{k}" TEXT' for k in fields)
+    db = sqlite3.connect(fn)
+    try:
+        db.execute(f'CREATE TABLE breeds ({columns})')
+        params = ', '.join('?' * len(fields))
+        db.executemany(f'INSERT INTO breeds VALUES ({params})', ([row.get(k) for k in fields] for row in rows))
+        for k in fields:
+            if k in INDEXED:
+                db.execute(f'CREATE INDEX "breeds_{k}" ON breeds ("{k}")')
+        db.commit()
+    finally:
+        db.close()
+
+
+def _arrow_table(rows, fields):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise Exception('pyarrow is required for parquet and arrow output, pip install pyarrow')
+    schema = pa.schema([(k, pa.int32() if k == 'id' else pa.string()) for k in fields])
+    return pa.Table.from_pylist([{k: row.get(k) for k in fields} for row in rows], schema=schema)
+
+
+def write_parquet(rows, fields, fn):
+    import pyarrow.parquet as pq
+    pq.write_table(_arrow_table(rows, fields), fn, compression='zstd')
+
+
+def write_arrow(rows, fields, fn):
+    import pyarrow.feather as feather
+    feather.write_feather(_arrow_table(rows, fields), fn, compression='uncompressed')
+
+
+def read_csv(fn):
+    with open(fn, 'r', newline='') as fp:
+        rows = list(csv.DictReader(fp))
+    for row in rows:
+        row['id'] = int(row['id'])
+        for k, v in row.items():
+            if v == '':
+                row[k] = None
+    return rows
+
+
+def read_jsonl(fn):
+    with open(fn, 'r') as fp:
+        return [json.loads(line) for line in fp]
+
+
+def read_sqlite(fn):
+    db = sqlite3.connect(fn)
+    try:
+        cur = db.execute('SELECT * FROM breeds ORDER BY id')
+        names = [x[0] for x in cur.description]
+        return [dict(zip(names, row)) for row in cur]
+    finally:
+        db.close()
+
+
+def read_parquet(fn):
+    import pyarrow.parquet as pq
+    return pq.read_table(fn).to_pylist()
+
+
+def read_arrow(fn):
+    import pyarrow.feather as feather
+    return feather.read_table(fn).to_pylist()
+
+
+WRITERS = dict(csv=write_csv, jsonl=write_jsonl, sqlite=write_sqlite, parquet=write_parquet, arrow=write_arrow)
+READERS = dict(csv=read_csv, jsonl=read_jsonl, sqlite=read_sqlite, parquet=read_parquet, arrow=read_arrow)
+
+
+def main(args):
+    if args.join:
+        rows, fields = join_rows(args.join), join_fields(args.join)
+    else:
+        rows, fields = iter_rows(args.data_dir), FIELDS
+
+    if args.incremental or args.changes:
+        changeset = export_incremental(rows, fields, args.outfile, format=args.format, changes=args.changes)
+        if changeset is None:
+            print('unchanged', file=sys.stderr)
+        else:
+            print('%d added, %d removed, %d modified' % tuple(len(changeset[k]) for k in ['added', 'removed', 'modified']), file=sys.stderr)
+    else:
+        export(rows, fields, args.outfile, format=args.format)
+
+
+def cli(argv=None, prog=None):
     import argparse
-    import sys
 
-    parser = argparse.ArgumentParser()
-    parser.add_argument('-i', '--data-dir', default='data', help='Data directory')
-    parser.add_argument('outfile', nargs='?', default=sys.stdout, type=argparse.FileType('w'))
-    args = parser.parse_args()
+    parser = argparse.ArgumentParser(prog=prog)
+    parser.add_argument('-i', '--data-dir', default='data', help='Data directory, or dump.sqlite store')
+    parser.add_argument('-j', '--join', metavar='LANG=DIR', action='append', type=lambda s: tuple(s.split('=', 1)),
+        help='Join dumps of several languages by id into one wide table, e.g. -j en=data/fci/dump -j fr=data/fci-fr/dump')
+    parser.add_argument('-f', '--format', choices=sorted(WRITERS),
+        help='Output format, default is guessed from the file name, or csv')
+    parser.add_argument('--incremental', action='store_true',
+        help='Write the output only if any row changed, keep row hashes in <outfile>.manifest.json')
+    parser.add_argument('--changes', metavar='FILE',
+        help='Write added, removed and modified rows as JSON, implies --incremental')
+    parser.add_argument('outfile', nargs='?', default='-', help='Output file, default is stdout')
+    args = parser.parse_args(argv)
+    main(args)
+
 
-    export_from(args.data_dir, args.outfile)
+if __name__ == '__main__':
+    cli()
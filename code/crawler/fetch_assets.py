@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+"""
+author: paiv, https://github.com/paiv/
+"""
+
+import core
+import sys
+from export_fci import iter_entries
+
+
+def main(args):
+    downloader = core.AssetDownloader(args.output, workers=args.jobs, rate=args.rate, revalidate=args.revalidate)
+    urls = [entry.get(k) for entry in iter_entries(args.data_dir) for k in args.fields]
+    downloader.download_all(urls)
+    print(downloader.report(), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Mirror breed illustrations and standards')
+    parser.add_argument('-i', '--data-dir', default='data/fci/dump', help='Dump directory, or dump.sqlite store')
+    parser.add_argument('-o', '--output', default='data/assets', help='Asset store directory')
+    parser.add_argument('-f', '--fields', type=lambda s: s.split(','), default=['thumb', 'pdf'],
+        help='Entry fields with asset URLs, default is thumb,pdf')
+    parser.add_argument('-j', '--jobs', type=int, default=4, help='Number of concurrent downloads')
+    parser.add_argument('--rate', type=float, help='Requests per second, per host, default is 1/s with -j > 1')
+    parser.add_argument('--revalidate', action='store_true',
+        help='Revalidate stored assets with If-None-Match, default is to skip them')
+    args = parser.parse_args()
+    main(args)
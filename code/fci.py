@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'crawler'))
+
+
+CRAWLERS = dict(fci='crawl_fci', pl='crawl_pl', uk='crawl_uk')
+LANGUAGES = ['en', 'fr', 'de', 'es']
+
+
+def csv_name(lang):
+    return 'fci-breeds.csv' if lang == 'en' else f'fci-breeds-{lang}.csv'
+
+
+def dump_dirs(data_dir, sources, languages):
+    dirs = dict()
+    if 'fci' in sources:
+        for i, lang in enumerate(languages):
+            dirs[lang] = Path(data_dir) / ('fci' if i == 0 else f'fci-{lang}')
+    for source in ['pl', 'uk']:
+        if source in sources:
+            dirs[source] = Path(f'{data_dir}-{source}') / 'fci'
+    return dirs
+
+
+def crawl(argv, prog):
+    import argparse
+    import crawl_args
+    import importlib
+
+    parser = argparse.ArgumentParser(prog=prog, description='Crawl one source, see <source> --help for its options')
+    parser.add_argument('source', choices=CRAWLERS, help='Source to crawl')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help='Options of the crawler')
+    args = parser.parse_args(argv)
+    options = crawl_args.parser(args.source, prog=f'{prog} {args.source}').parse_args(args.args)
+    module = importlib.import_module(CRAWLERS[args.source])
+    module.main(options)
+
+
+def export(argv, prog):
+    import export_fci
+    export_fci.cli(argv, prog=prog)
+
+
+def render(argv, prog):
+    import genpage
+    genpage.cli(argv, prog=prog)
+
+
+def refresh(argv, prog):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog,
+        description='Crawl every source, export the CSVs and render the pages, in one process')
+    parser.add_argument('-o', '--data-dir', default='data',
+        help='Data directory of the FCI crawl, other sources go to <data-dir>-pl and <data-dir>-uk')
+    parser.add_argument('-s', '--sources', type=lambda s: s.split(','), default=list(CRAWLERS),
+        help='Sources to refresh, default is fci,pl,uk')
+    parser.add_argument('--languages', type=lambda s: s.split(','), default=LANGUAGES,
+        help='FCI languages, default is en,fr,de,es')
+    parser.add_argument('--url', help='Base URL of the FCI crawl, default is https://www.fci.be/<language>/nomenclature/')
+    parser.add_argument('--one-pass', action='store_true',
+        help='Crawl the FCI breed pages once for all languages, instead of one crawl per language')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of concurrent requests')
+    parser.add_argument('--rate', type=float, help='Requests per second, per host, default is 1/s with -j > 1')
+    parser.add_argument('--reset', action='store_true', help='Reset data before crawling')
+    parser.add_argument('--journal', action='store_true', help='Keep crawler state in an append-only journal')
+    parser.add_argument('--store', action='store_true', help='Dump entries into a single SQLite store')
+    parser.add_argument('--progress', action='store_true', help='Show a progress line with ETA instead of URLs')
+    parser.add_argument('--no-crawl', action='store_true', help='Export and render the data already collected')
+    parser.add_argument('--csv-dir', default='.', help='Directory of the fci-breeds*.csv files')
+    parser.add_argument('-r', '--render', metavar='DIR', help='Render the pages into DIR, as genpage.py --batch')
+    parser.add_argument('--search', action='store_true', help='Write index*.search.json sidecars')
+    parser.add_argument('-z', '--compress', action='store_true', help='Write .gz and .br siblings of the pages')
+    args = parser.parse_args(argv)
+
+    if not args.no_crawl:
+        import core
+        from crawl_fci import FciCrawler
+
+        options = dict(workers=args.jobs, rate=args.rate, store=args.store, progress=args.progress,
+            state=core.JournalState if args.journal else None)
+        crawlers = list()
+        if 'fci' in args.sources and args.one_pass:
+            crawlers.append(FciCrawler(url=args.url, basedir=args.data_dir, language=args.languages[0],
+                languages=args.languages if len(args.languages) > 1 else None, **options))
+        elif 'fci' in args.sources:
+            for lang, todir in dump_dirs(args.data_dir, ['fci'], args.languages).items():
+                url = args.url and args.url.replace(f'/{args.languages[0]}/', f'/{lang}/', 1)
+                crawlers.append(FciCrawler(url=url, basedir=todir.parent, dirname=todir.name, language=lang, **options))
+        if 'pl' in args.sources:
+            import crawl_pl
+            crawlers.append(FciCrawler(url=crawl_pl.BASE_URL, basedir=f'{args.data_dir}-pl',
+                parser=crawl_pl.PlParser(), **options))
+        if 'uk' in args.sources:
+            import crawl_uk
+            crawlers.append(FciCrawler(url=crawl_uk.BASE_URL, basedir=f'{args.data_dir}-uk',
+                parser=crawl_uk.UkParser(), **options))
+        for craw in crawlers:
+            if args.reset:
+                craw.reset()
+            craw.crawl()
+
+    import export_fci
+
+    files = list()
+    for lang, todir in dump_dirs(args.data_dir, args.sources, args.languages).items():
+        src = todir / ('dump.sqlite' if args.store else 'dump')
+        fn = Path(args.csv_dir) / csv_name(lang)
+        rows = list(export_fci.iter_rows(src))
+        if not rows:
+            print(f'{src}: no entries, {fn} is left as is', file=sys.stderr)
+            continue
+        export_fci.export(rows, export_fci.FIELDS, fn)
+        print(f'{fn}: {len(rows)} breeds', file=sys.stderr)
+        files.append(str(fn))
+
+    if args.render and files:
+        import genpage
+        for fn in genpage.build_all(files, args.render, search=args.search, compress=args.compress):
+            print(fn, file=sys.stderr)
+
+
+COMMANDS = {
+    'crawl': crawl,
+    'export': export,
+    'render': render,
+    'refresh-all': refresh,
+}
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Collect, export and publish the FCI breeds datasets',
+        epilog='commands: crawl {fci,pl,uk}, export, render, refresh-all; see <command> --help')
+    parser.add_argument('command', choices=COMMANDS, help='Command to run')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help='Options of the command')
+    args = parser.parse_args(argv)
+    COMMANDS[args.command](args.args, prog=f'{parser.prog} {args.command}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,14 @@
 #!/usr/bin/env python
 import csv
+import gzip
+import hashlib
+import json
+import re
 import sys
-import template
+import unicodedata
+from collections import defaultdict
+from contextlib import nullcontext
+from functools import lru_cache, partial
 from datetime import datetime, UTC
 from pathlib import Path
 from urllib.parse import urlparse
@@ -31,37 +38,26 @@ def gen_(row, name):
     return f'<div>{value}</div>\n'
 
 
-def main(args):
-    fin = args.file
-    fout = args.output or sys.stdout
-    lang = args.lang or 'en'
-    base_url = args.url
-    reader = csv.DictReader(fin)
+def gen_payload(rows, fieldnames):
+    data = dict(fields=fieldnames, rows=[[row.get(k) or '' for k in fieldnames] for row in rows])
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return payload.replace('<', '\\u003c')
 
-    gens = dict(id=gen_id, url=gen_link, image=gen_link, pdf=gen_link)
-    
-    fieldnames = list(reader.fieldnames)
 
-    def row_entries(row):
-        for k in fieldnames:
-            gen = gens.get(k, gen_)
-            yield gen(row, k)
+def gen_columns(rows, fieldnames):
+    links = {'url', 'image', 'pdf'}
 
-    def entries():
-        rpl = '<div>\n&entries\n</div>'
-        for row in reader:
-            yield template.format(rpl, entries=row_entries(row))
+    def width(row, name):
+        value = row.get(name) or ''
+        if name in links:
+            value = Path(urlparse(value).path).name
+        return len(value)
 
-    context = dict()
-    context['timestamp'] = datetime.now(UTC).date().isoformat()
-    context['lang'] = lang
-    context['base_url'] = base_url
-    context['ncols'] = len(fieldnames)
-    context['fieldnames'] = map(gen_th, fieldnames)
-    context['entries'] = entries()
-    context['archive'] = 'fci-breeds.tar.gz'
+    widths = [max([len(k)] + [width(row, k) for row in rows]) for k in fieldnames]
+    return ' '.join(f'{min(w, 80) + 2}ch' for w in widths)
 
-    tpl = '''\
+
+PAGE_HEAD = '''\
 <!DOCTYPE html>
 <html lang="&lang">
 <head>
@@ -75,6 +71,30 @@ def main(args):
 }
 .h1 h1 { display: inline; margin-right: 1rem; }
 .h1 a { font-size: x-large; }
+'''
+
+PAGE_INFO = '''\
+</style>
+</head>
+<body>
+<div class="info" lang="en">
+<div class="h1">
+<h1>FCI Breeds</h1>
+<a href=".">en</a>
+| <a href="index-fr.html">fr</a>
+| <a href="index-de.html">de</a>
+| <a href="index-es.html">es</a>
+| <a href="index-pl.html">pl</a>
+| <a href="index-uk.html">uk</a>
+</div>
+<p><a href="https://ukrainewar.carrd.co/"><img src="StandWithUkraine.svg" alt="standwithukraine"></a></p>
+<p>Data compiled from <a href="&{base_url}">&{base_url}</a>.</p>
+<p>Generated on &{timestamp}</p>
+<p>Download: <a href="https://github.com/paiv/fci-breeds/releases/latest/download/&{archive}">CSV</a></p>
+</div>
+'''
+
+STATIC_STYLE = '''\
 .table {
   display: grid;
   gap: 0;
@@ -95,43 +115,515 @@ def main(args):
 .table > div:hover > div {
     background-color: var(--hi);
 }
-</style>
-</head>
-<body>
-<div class="info" lang="en">
-<div class="h1">
-<h1>FCI Breeds</h1>
-<a href=".">en</a>
-| <a href="index-fr.html">fr</a>
-| <a href="index-de.html">de</a>
-| <a href="index-es.html">es</a>
-| <a href="index-pl.html">pl</a>
-| <a href="index-uk.html">uk</a>
-</div>
-<p><a href="https://ukrainewar.carrd.co/"><img src="StandWithUkraine.svg" alt="standwithukraine"></a></p>
-<p>Data compiled from <a href="&{base_url}">&{base_url}</a>.</p>
-<p>Generated on &{timestamp}</p>
-<p>Download: <a href="https://github.com/paiv/fci-breeds/releases/latest/download/&{archive}">CSV</a></p>
-</div>
+'''
+
+STATIC_TABLE = '''\
 <div class="table">
 <div>
 &{fieldnames}
 </div>
 &{entries}
 </div>
+'''
+
+PAGE_END = '''\
 </body>
 </html>
 '''
-    template.print(tpl, context, file=fout)
 
+VIRTUAL_STYLE = '''\
+.vtable { white-space: nowrap; width: max-content; }
+.vtable .tr {
+  display: grid;
+  grid-template-columns: &{columns};
+  height: 1.5rem;
+  line-height: 1.5rem;
+}
+.vtable .th {
+  font-weight: bolder;
+  text-align: center;
+}
+.vtable .tr > div {
+  border-right: 1px solid #ccc;
+  padding: 0 1rem;
+  overflow: hidden;
+  text-overflow: ellipsis;
+}
+.vtable .tr:hover > div {
+    background-color: var(--hi);
+}
+.vtable .body { position: relative; }
+.vtable .rows { position: absolute; top: 0; left: 0; right: 0; }
+'''
 
-if __name__ == '__main__':
+VIRTUAL_TABLE = '''\
+<noscript><p>&{noscript}</p></noscript>
+<div class="vtable">
+<div class="tr">
+&{fieldnames}
+</div>
+<div class="body" id="vbody"><div class="rows" id="vrows"></div></div>
+</div>
+<script type="application/json" id="vdata">&{payload}</script>
+<script>
+(function() {
+  var data = JSON.parse(document.getElementById('vdata').textContent);
+  var fields = data.fields, all = data.rows, rows = all;
+  var body = document.getElementById('vbody');
+  var view = document.getElementById('vrows');
+  var links = { url: 1, image: 1, pdf: 1 };
+  var urlIndex = fields.indexOf('url');
+  var rowHeight = 0, first = -1, last = -1, overscan = 10, pending = false;
+
+  function basename(href) {
+    var path = href;
+    try { path = new URL(href).pathname; } catch (e) {}
+    return path.substring(path.lastIndexOf('/') + 1);
+  }
+
+  function anchor(href, text) {
+    var a = document.createElement('a');
+    a.href = href;
+    a.textContent = text;
+    return a;
+  }
+
+  function cell(row, i) {
+    var div = document.createElement('div');
+    var name = fields[i], value = row[i];
+    if (name === 'id') {
+      var href = urlIndex < 0 ? '' : row[urlIndex];
+      if (href) div.appendChild(anchor(href, value));
+      else div.textContent = value;
+    }
+    else if (links[name]) {
+      if (value) div.appendChild(anchor(value, basename(value)));
+    }
+    else {
+      div.textContent = value;
+    }
+    return div;
+  }
+
+  function line(row) {
+    var tr = document.createElement('div');
+    tr.className = 'tr';
+    for (var i = 0; i < fields.length; ++i) {
+      tr.appendChild(cell(row, i));
+    }
+    return tr;
+  }
+
+  function render() {
+    pending = false;
+    var top = body.getBoundingClientRect().top;
+    var a = Math.max(0, Math.floor(-top / rowHeight) - overscan);
+    var b = Math.min(rows.length, Math.ceil((window.innerHeight - top) / rowHeight) + overscan);
+    if (a === first) {
+      if (b === last) return;
+    }
+    first = a;
+    last = b;
+    var frag = document.createDocumentFragment();
+    for (var i = a; i < b; ++i) {
+      frag.appendChild(line(rows[i]));
+    }
+    view.replaceChildren(frag);
+    view.style.transform = 'translateY(' + (a * rowHeight) + 'px)';
+  }
+
+  function schedule() {
+    if (!pending) {
+      pending = true;
+      window.requestAnimationFrame(render);
+    }
+  }
+
+  if (rows.length) {
+    view.appendChild(line(rows[0]));
+    rowHeight = view.firstChild.offsetHeight || 24;
+  }
+  rowHeight = rowHeight || 24;
+  body.style.height = (rows.length * rowHeight) + 'px';
+  render();
+  window.addEventListener('scroll', schedule, { passive: true });
+  window.addEventListener('resize', schedule);
+
+  window.fciTable = {
+    show: function(indexes) {
+      rows = indexes ? indexes.map(function(i) { return all[i]; }) : all;
+      body.style.height = (rows.length * rowHeight) + 'px';
+      first = -1;
+      render();
+    }
+  };
+})();
+</script>
+'''
+
+SEARCH_STYLE = '''\
+.search { margin: 0.5rem 0; }
+.search input { font-size: large; width: 20rem; max-width: 90vw; }
+.table > div.off { display: none; }
+'''
+
+SEARCH_BOX = '''\
+<div class="search"><input id="search" type="search" placeholder="Search" autocomplete="off"></div>
+'''
+
+STATIC_SEARCH = '''\
+<script>
+(function() {
+  var lines = document.querySelectorAll('.table > div');
+  window.fciTable = {
+    show: function(indexes) {
+      var on = null;
+      if (indexes) {
+        on = {};
+        indexes.forEach(function(i) { on[i] = true; });
+      }
+      for (var i = 1; i < lines.length; ++i) {
+        lines[i].classList.toggle('off', on ? !on[i - 1] : false);
+      }
+    }
+  };
+})();
+</script>
+'''
+
+SEARCH_SCRIPT = '''\
+<script>
+(function() {
+  var input = document.getElementById('search');
+  var index = null, loading = false, timer = null;
+  var extra = { '\u0142': 'l', '\u0111': 'd', '\u00f8': 'o', '\u00e6': 'ae', '\u0153': 'oe', '\u00df': 'ss' };
+
+  function fold(s) {
+    return s.normalize('NFKD').replace(/\\p{M}/gu, '').toLowerCase().replace(/[\u0142\u0111\u00f8\u00e6\u0153\u00df]/g, function(c) { return extra[c]; });
+  }
+
+  function intersect(a, b) {
+    var res = [], i = 0, j = 0;
+    while (i < a.length) {
+      if (j >= b.length) break;
+      if (a[i] < b[j]) ++i;
+      else if (a[i] > b[j]) ++j;
+      else { res.push(a[i]); ++i; ++j; }
+    }
+    return res;
+  }
+
+  function postings(table, key) {
+    var value = table[key];
+    if (value === undefined) return [];
+    if (typeof value === 'string') {
+      var prev = 0;
+      value = value.split(',').map(function(x) { prev += parseInt(x, 36); return prev; });
+      table[key] = value;
+    }
+    return value;
+  }
+
+  function lookup(token) {
+    var n = index.prefixLength;
+    var hits = postings(index.prefix, token.substring(0, n));
+    for (var i = 0; i + 3 <= token.length; ++i) {
+      if (token.length <= n) break;
+      hits = intersect(hits, postings(index.trigram, token.substring(i, i + 3)));
+    }
+    return hits;
+  }
+
+  function search() {
+    var tokens = fold(input.value).match(/[\\p{L}\\p{N}]+/gu);
+    if (!tokens) return window.fciTable.show(null);
+    var hits = null;
+    tokens.forEach(function(token) {
+      hits = hits ? intersect(hits, lookup(token)) : lookup(token);
+    });
+    window.fciTable.show(hits);
+  }
+
+  function load() {
+    if (index) return search();
+    if (loading) return;
+    loading = true;
+    fetch('&{search_href}').then(function(r) { return r.json(); }).then(function(data) {
+      index = data;
+      search();
+    });
+  }
+
+  input.addEventListener('focus', load, { once: true });
+  input.addEventListener('input', function() {
+    clearTimeout(timer);
+    timer = setTimeout(load, 50);
+  });
+})();
+</script>
+'''
+
+_fold_extra = str.maketrans({'\u0142': 'l', '\u0111': 'd', '\u00f8': 'o', '\u00e6': 'ae', '\u0153': 'oe', '\u00df': 'ss'})
+_token = re.compile(r'[^\W_]+')
+
+
+def fold(text):
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.category(c).startswith('M'))
+    return text.lower().translate(_fold_extra)
+
+
+def gen_search_index(rows, fields=('name', 'country', 'group', 'section'), prefixLength=6):
+    prefix = defaultdict(list)
+    trigram = defaultdict(list)
+    for i, row in enumerate(rows):
+        ps = set()
+        ts = set()
+        for k in fields:
+            for token in _token.findall(fold(row.get(k) or '')):
+                ps.update(token[:n] for n in range(1, min(len(token), prefixLength) + 1))
+                ts.update(token[j:j+3] for j in range(len(token) - 2))
+        for x in ps:
+            prefix[x].append(i)
+        for x in ts:
+            trigram[x].append(i)
+    fields = [k for k in fields if k in (rows[0] if rows else fields)]
+    return dict(version=1, size=len(rows), fields=fields, prefixLength=prefixLength,
+        prefix={k: encode_postings(v) for k, v in sorted(prefix.items())},
+        trigram={k: encode_postings(v) for k, v in sorted(trigram.items())})
+
+
+def encode_postings(indexes):
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    res = list()
+    prev = 0
+    for x in indexes:
+        n, s = x - prev, ''
+        prev = x
+        while True:
+            n, r = divmod(n, 36)
+            s = digits[r] + s
+            if not n:
+                break
+        res.append(s)
+    return ','.join(res)
+
+
+SOURCES = dict(
+    en='https://www.fci.be/en/nomenclature/',
+    fr='https://www.fci.be/fr/nomenclature/',
+    de='https://www.fci.be/de/nomenclature/',
+    es='https://www.fci.be/es/nomenclature/',
+    pl='https://www.zkwp.pl/wzorce.php',
+    uk='https://uku.com.ua/plem_work/breed_fci/',
+)
+
+
+@lru_cache(maxsize=None)
+def page_template(mode, search):
+    if mode == 'virtual':
+        style, table, hook = VIRTUAL_STYLE, VIRTUAL_TABLE, ''
+    else:
+        style, table, hook = STATIC_STYLE, STATIC_TABLE, STATIC_SEARCH
+    if search:
+        return PAGE_HEAD + style + SEARCH_STYLE + PAGE_INFO + SEARCH_BOX + table + hook + SEARCH_SCRIPT + PAGE_END
+    return PAGE_HEAD + style + PAGE_INFO + table + PAGE_END
+
+
+ROW_GENERATORS = dict(id=gen_id, url=gen_link, image=gen_link, pdf=gen_link)
+
+
+def compile_row(fieldnames):
+    plan = [partial(ROW_GENERATORS.get(k, gen_), name=k) for k in fieldnames]
+
+    def render_row(row):
+        return '<div>\n' + ''.join([gen(row) for gen in plan]) + '</div>'
+
+    return render_row
+
+
+def render(fin, fout, lang='en', base_url=None, mode='static', static_href=None, search_index=None, search_href=None):
+    reader = csv.DictReader(fin)
+    fieldnames = list(reader.fieldnames)
+    rows = list(reader)
+
+    def entries():
+        return map(compile_row(fieldnames), rows)
+
+    context = dict()
+    context['timestamp'] = datetime.now(UTC).date().isoformat()
+    context['lang'] = lang
+    context['base_url'] = base_url or SOURCES.get(lang)
+    context['ncols'] = len(fieldnames)
+    context['fieldnames'] = map(gen_th, fieldnames)
+    context['archive'] = 'fci-breeds.tar.gz'
+
+    if mode == 'virtual':
+        context['columns'] = gen_columns(rows, fieldnames)
+        context['payload'] = gen_payload(rows, fieldnames)
+        if static_href:
+            context['noscript'] = f'<a href="{static_href}">Static version of this page</a>'
+        else:
+            context['noscript'] = 'This page needs JavaScript to show the table.'
+    else:
+        context['entries'] = entries()
+
+    if search_index:
+        with open(search_index, 'w') as fp:
+            json.dump(gen_search_index(rows), fp, ensure_ascii=False, separators=(',', ':'))
+        context['search_href'] = search_href or Path(search_index).name
+
+    import template
+    template.print(page_template(mode, bool(search_index)), context, file=fout)
+
+
+def lang_of(fn):
+    m = re.fullmatch(r'fci-breeds(?:-(\w+))?', Path(fn).stem)
+    return (m.group(1) if m else None) or 'en'
+
+
+def precompress(fn):
+    data = fn.read_bytes()
+    res = list()
+    gz = fn.with_name(fn.name + '.gz')
+    with open(gz, 'wb') as fp:
+        with gzip.GzipFile(filename='', mode='wb', compresslevel=9, fileobj=fp, mtime=0) as zf:
+            zf.write(data)
+    res.append(gz)
+    try:
+        import brotli
+    except ImportError:
+        print(f'brotli is not installed, skipping {fn.name}.br', file=sys.stderr)
+    else:
+        br = fn.with_name(fn.name + '.br')
+        br.write_bytes(brotli.compress(data, quality=11))
+        res.append(br)
+    return res
+
+
+BUILD_MANIFEST = '.genpage.json'
+
+BUFFER_SIZE = 1 << 16
+
+
+def page_name(fn):
+    lang = lang_of(fn)
+    return 'index.html' if lang == 'en' else f'index-{lang}.html'
+
+
+def file_hash(fn):
+    h = hashlib.sha256()
+    with open(fn, 'rb') as fp:
+        while (chunk := fp.read(BUFFER_SIZE)):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def template_hash(mode, search, compress):
+    h = hashlib.sha256()
+    h.update(page_template(mode, search).encode())
+    h.update(Path(__file__).read_bytes())
+    h.update(json.dumps([mode, search, compress]).encode())
+    return h.hexdigest()
+
+
+def build(fn, outdir, mode='static', search=False, compress=False):
+    lang = lang_of(fn)
+    out = Path(outdir) / page_name(fn)
+    search_index = out.with_suffix('.search.json') if search else None
+    with open(fn) as fin, open(out, 'w', buffering=BUFFER_SIZE) as fout:
+        render(fin, fout, lang=lang, mode=mode, search_index=search_index)
+    written = [out] + ([search_index] if search_index else [])
+    if compress:
+        written += [x for f in list(written) for x in precompress(f)]
+    return written
+
+
+def build_all(files, outdir, mode='static', search=False, compress=False, jobs=None, force=False):
+    outdir = Path(outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    manifestFile = outdir / BUILD_MANIFEST
+    manifest = dict()
+    if manifestFile.exists():
+        with open(manifestFile) as fp:
+            manifest = json.load(fp)
+
+    tplHash = template_hash(mode, search, compress)
+    stamps = {page_name(fn): dict(input=file_hash(fn), template=tplHash) for fn in files}
+
+    def fresh(fn):
+        name = page_name(fn)
+        return manifest.get(name) == stamps[name] and (outdir / name).exists()
+
+    stale = [fn for fn in files if force or not fresh(fn)]
+    for fn in files:
+        if fn not in stale:
+            print(f'{page_name(fn)} is up to date', file=sys.stderr)
+
+    res = list()
+    if stale:
+        from concurrent.futures import ProcessPoolExecutor
+        task = partial(build, outdir=outdir, mode=mode, search=search, compress=compress)
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            res = [x for written in pool.map(task, stale) for x in written]
+
+    manifest.update(stamps)
+    with open(manifestFile, 'w') as fp:
+        json.dump(manifest, fp, indent=2, sort_keys=True)
+    return res
+
+
+def main(args):
+    if args.batch:
+        files = args.file or sorted(map(str, Path('.').glob('fci-breeds*.csv')))
+        for fn in build_all(files, args.batch, mode=args.mode, search=args.search,
+                compress=args.compress, jobs=args.jobs, force=args.force):
+            print(fn, file=sys.stderr)
+        return
+
+    fn = args.file[0] if args.file else 'fci-breeds.csv'
+    with (nullcontext(sys.stdin) if fn == '-' else open(fn) as fin,
+            open(args.output, 'w') if args.output else nullcontext(sys.stdout) as fout):
+        render(fin, fout, lang=args.lang or 'en', base_url=args.url, mode=args.mode,
+            static_href=args.static_href, search_index=args.search_index, search_href=args.search_href)
+
+
+def cli(argv=None, prog=None):
     import argparse
-    parser = argparse.ArgumentParser(description='HTML page generator for the fci-breeds.csv')
-    parser.add_argument('file', nargs='?', default='fci-breeds.csv', type=argparse.FileType(),
-        help='the CSV file to process, default is fci-breeds.csv')
+    parser = argparse.ArgumentParser(prog=prog, description='HTML page generator for the fci-breeds.csv')
+    parser.add_argument('file', nargs='*',
+        help='the CSV file to process, - for stdin, default is fci-breeds.csv; in batch mode, default is all fci-breeds*.csv')
     parser.add_argument('-l', '--lang', help='language code')
     parser.add_argument('--url', default='https://www.fci.be/en/nomenclature/', help='data origin URL')
-    parser.add_argument('-o', '--output', type=argparse.FileType('w'), help='destination file name')
-    args = parser.parse_args()
+    parser.add_argument('-o', '--output', help='destination file name')
+    parser.add_argument('-m', '--mode', choices=['static', 'virtual'], default='static',
+        help='static renders every cell as HTML; virtual embeds the rows as JSON and renders visible rows with JS')
+    parser.add_argument('--static-href', help='link to the static page, shown to clients without JS in virtual mode')
+    parser.add_argument('--search-index', metavar='FILE', help='write a search index sidecar and add a search box to the page')
+    parser.add_argument('--search-href', help='URL of the search index from the page, default is the index file name')
+    parser.add_argument('-b', '--batch', metavar='DIR',
+        help='render every CSV into DIR in parallel, as index.html and index-<lang>.html')
+    parser.add_argument('--search', action='store_true', help='in batch mode, write index*.search.json sidecars')
+    parser.add_argument('-z', '--compress', action='store_true', help='write .gz and .br siblings of the outputs')
+    parser.add_argument('-f', '--force', action='store_true', help='in batch mode, rebuild pages that are up to date')
+    parser.add_argument('-j', '--jobs', type=int, help='number of worker processes in batch mode')
+    args = parser.parse_args(argv)
+    if args.batch:
+        for flag, on in [('--lang', args.lang), ('--output', args.output), ('--url', args.url != parser.get_default('url')),
+                ('--static-href', args.static_href), ('--search-index', args.search_index),
+                ('--search-href', args.search_href)]:
+            if on:
+                parser.error(f'{flag} is not supported with --batch')
+    else:
+        if len(args.file) > 1:
+            parser.error('only one file is rendered without --batch')
+        for flag, on in [('--search', args.search), ('--compress', args.compress),
+                ('--force', args.force), ('--jobs', args.jobs is not None)]:
+            if on:
+                parser.error(f'{flag} requires --batch')
     main(args)
+
+
+if __name__ == '__main__':
+    cli()